@@ -307,6 +307,28 @@ class ThumbnailCache( object ):
         self._controller.sub( self, 'NotifyNewOptions', 'notify_new_options' )
         
     
+    def _CancelWaterfall( self, page_key: bytes, medias: list ):
+        
+        self._waterfall_queue_quick.difference_update( ( ( page_key, media ) for media in medias ) )
+        
+        cancelled_display_medias = { media.GetDisplayMedia() for media in medias }
+        
+        cancelled_display_medias.discard( None )
+        
+        cancelled_media_results = { media.GetMediaResult() for media in cancelled_display_medias }
+        
+        outstanding_delayed_hashes = { media_result.GetHash() for media_result in cancelled_media_results if media_result in self._delayed_regeneration_queue_quick }
+        
+        if len( outstanding_delayed_hashes ) > 0:
+            
+            self._controller.files_maintenance_manager.ScheduleJob( outstanding_delayed_hashes, ClientFiles.REGENERATE_FILE_DATA_JOB_FORCE_THUMBNAIL )
+            
+        
+        self._delayed_regeneration_queue_quick.difference_update( cancelled_media_results )
+        
+        self._RecalcQueues()
+        
+    
     def _GetBestRecoveryThumbnailHydrusBitmap( self, display_media ):
         
         if self._allow_blurhash_fallback:
@@ -610,24 +632,17 @@ class ThumbnailCache( object ):
         
         with self._lock:
             
-            self._waterfall_queue_quick.difference_update( ( ( page_key, media ) for media in medias ) )
-            
-            cancelled_display_medias = { media.GetDisplayMedia() for media in medias }
-            
-            cancelled_display_medias.discard( None )
+            self._CancelWaterfall( page_key, medias )
             
-            cancelled_media_results = { media.GetMediaResult() for media in cancelled_display_medias }
-            
-            outstanding_delayed_hashes = { media_result.GetHash() for media_result in cancelled_media_results if media_result in self._delayed_regeneration_queue_quick }
+        
+    
+    def CancelWaterfallAll( self, page_key: bytes ):
+        
+        with self._lock:
             
-            if len( outstanding_delayed_hashes ) > 0:
-                
-                self._controller.files_maintenance_manager.ScheduleJob( outstanding_delayed_hashes, ClientFiles.REGENERATE_FILE_DATA_JOB_FORCE_THUMBNAIL )
-                
+            medias = [ media for ( media_page_key, media ) in self._waterfall_queue_quick if media_page_key == page_key ]
             
-            self._delayed_regeneration_queue_quick.difference_update( cancelled_media_results )
-            
-            self._RecalcQueues()
+            self._CancelWaterfall( page_key, medias )
             
         
     
@@ -785,6 +800,38 @@ class ThumbnailCache( object ):
             
         
     
+    def HasThumbnailsCached( self, medias ):
+        
+        # as HasThumbnailCached, but for a whole canvas page at once, so we only hit the cache lock the one time
+        cached_hashes = set()
+        hashes_to_check = []
+        
+        for media in medias:
+            
+            display_media = media.GetDisplayMedia()
+            
+            if display_media is None:
+                
+                continue
+                
+            
+            hash = display_media.GetHash()
+            
+            if display_media.GetMime() in HC.MIMES_WITH_THUMBNAILS and self._ShouldBeAbleToProvideThumb( display_media ):
+                
+                hashes_to_check.append( hash )
+                
+            else:
+                
+                cached_hashes.add( hash )
+                
+            
+        
+        cached_hashes.update( self._data_cache.FilterKeysWithData( hashes_to_check ) )
+        
+        return cached_hashes
+        
+    
     def NotifyNewOptions( self ):
         
         cache_size = self._controller.new_options.GetInteger( 'thumbnail_cache_size' )
@@ -146,6 +146,14 @@ class DataCache( object ):
             
         
     
+    def FilterKeysWithData( self, keys ) -> typing.Set:
+        
+        with self._lock:
+            
+            return { key for key in keys if key in self._keys_to_data }
+            
+        
+    
     def GetData( self, key ) -> CacheableObject:
         
         with self._lock:
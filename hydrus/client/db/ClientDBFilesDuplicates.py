@@ -1546,3 +1546,11 @@ class ClientDBFilesDuplicates( ClientDBModule.ClientDBModule ):
         self.SetKing( hash_id, media_id )
         
     
+    def SetKingsFromHashes( self, hashes ):
+        
+        for hash in hashes:
+            
+            self.SetKingFromHash( hash )
+            
+        
+    
@@ -7007,11 +7007,15 @@ The password is cleartext here but obscured in the entry dialog. Enter a blank p
             
             self._system_tray_icon.show()
             
-            self._system_tray_icon.SetShouldAlwaysShow( always_show_system_tray_icon )
-            self._system_tray_icon.SetUIIsCurrentlyShown( not self._currently_minimised_to_system_tray )
-            self._system_tray_icon.SetUIIsCurrentlyMinimised( self.isMinimized() )
-            self._system_tray_icon.SetNetworkTrafficPaused( new_options.GetBoolean( 'pause_all_new_network_traffic' ) )
-            self._system_tray_icon.SetSubscriptionsPaused( new_options.GetBoolean( 'pause_subs_sync' ) )
+            self._system_tray_icon.SetState(
+                app_display_name = new_options.GetString( 'app_display_name' ),
+                should_always_show = always_show_system_tray_icon,
+                ui_is_currently_shown = not self._currently_minimised_to_system_tray,
+                ui_is_currently_minimised = self.isMinimized(),
+                network_traffic_paused = new_options.GetBoolean( 'pause_all_new_network_traffic' ),
+                subscriptions_paused = new_options.GetBoolean( 'pause_subs_sync' )
+            )
+            
             
         else:
             
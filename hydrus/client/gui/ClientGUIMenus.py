@@ -80,6 +80,26 @@ def AppendMenuItem( menu, label, description, callable, *args, role: QW.QAction.
     return menu_item
     
 
+def AppendMenuItemForSignal( menu, label, description, signal, role: QW.QAction.MenuRole = None ):
+    
+    # for when the menu item just fires one of our signals--signal to signal is wired up in Qt, no python trampoline
+    
+    menu_item = QW.QAction( menu )
+    
+    if HC.PLATFORM_MACOS:
+        
+        menu_item.setMenuRole( role if role is not None else QW.QAction.MenuRole.NoRole )
+        
+    
+    SetMenuTexts( menu_item, label, description )
+    
+    menu.addAction( menu_item )
+    
+    menu_item.triggered.connect( signal )
+    
+    return menu_item
+    
+
 def AppendMenuLabel( menu, label, description = '', copy_text = '', no_copy = False ):
     
     if no_copy:
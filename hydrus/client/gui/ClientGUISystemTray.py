@@ -1,3 +1,4 @@
+import contextlib
 import os
 
 from qtpy import QtCore as QC
@@ -13,6 +14,80 @@ from hydrus.client.gui import QtPorting as QP
 
 SystemTrayAvailable = QW.QSystemTrayIcon.isSystemTrayAvailable
 
+_LABELS = {
+    ( 'show', True ) : 'hide',
+    ( 'show', False ) : 'show',
+    ( 'minimise', True ) : 'restore',
+    ( 'minimise', False ) : 'minimise',
+    ( 'net', True ) : 'unpause network traffic',
+    ( 'net', False ) : 'pause network traffic',
+    ( 'sub', True ) : 'unpause subscriptions',
+    ( 'sub', False ) : 'pause subscriptions'
+}
+
+# state name : ( attribute, setter )
+_STATE_ATTRIBUTES_AND_SETTERS = {
+    'app_display_name' : ( '_app_display_name', 'SetAppDisplayName' ),
+    'should_always_show' : ( '_should_always_show', 'SetShouldAlwaysShow' ),
+    'ui_is_currently_shown' : ( '_ui_is_currently_shown', 'SetUIIsCurrentlyShown' ),
+    'ui_is_currently_minimised' : ( '_ui_is_currently_minimised', 'SetUIIsCurrentlyMinimised' ),
+    'network_traffic_paused' : ( '_network_traffic_paused', 'SetNetworkTrafficPaused' ),
+    'subscriptions_paused' : ( '_subscriptions_paused', 'SetSubscriptionsPaused' )
+}
+
+_HYDRUS_TRAY_ICON = None
+
+def _GetTrayIcon() -> QG.QIcon:
+    
+    # the tray icon gets remade when options change, so no need to decode the png from disk every time
+    
+    global _HYDRUS_TRAY_ICON
+    
+    if _HYDRUS_TRAY_ICON is None:
+        
+        png_path = os.path.join( HC.STATIC_DIR, 'hydrus_non-transparent.png' )
+        
+        _HYDRUS_TRAY_ICON = QG.QIcon( png_path )
+        
+    
+    return _HYDRUS_TRAY_ICON
+    
+
+def _IsStatusNotifierAvailable() -> bool:
+    
+    try:
+        
+        from qtpy import QtDBus
+        
+        bus = QtDBus.QDBusConnection.sessionBus()
+        
+        if not bus.isConnected():
+            
+            return False
+            
+        
+        reply = bus.interface().isServiceRegistered( 'org.kde.StatusNotifierWatcher' )
+        
+        return bool( reply.value() if hasattr( reply, 'value' ) else reply )
+        
+    except Exception:
+        
+        return False
+        
+    
+
+def _NeedsMenuRegenOnShow() -> bool:
+    
+    # the old XEmbed tray is the one that loses the context menu when hidden. Windows, macOS, and StatusNotifierItem hosts (KDE, GNOME with appindicator, etc...) keep it fine
+    
+    if QG.QGuiApplication.platformName() != 'xcb':
+        
+        return False
+        
+    
+    return not _IsStatusNotifierAvailable()
+    
+
 class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
     
     flip_show_ui = QC.Signal()
@@ -32,99 +107,110 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
         self._network_traffic_paused = False
         self._subscriptions_paused = False
         
-        self._show_hide_menu_item = None
-        self._network_traffic_menu_item = None
-        self._subscriptions_paused_menu_item = None
+        self._app_display_name = CG.client_controller.new_options.GetString( 'app_display_name' )
+        self._last_tooltip = None
+        self._deferred_refresh = False
         
-        self._just_clicked_to_show = False
+        self._last_click_to_show_timer = QC.QElapsedTimer()
         
-        png_path = os.path.join( HC.STATIC_DIR, 'hydrus_non-transparent.png' )
+        self._menu_dirty = True
+        self._current_labels = {}
         
-        self.setIcon( QG.QIcon( png_path ) )
+        self._in_batch = False
+        self._pending_updates = set()
         
-        self.activated.connect( self._ClickActivated )
+        self._needs_menu_regen_on_show = _NeedsMenuRegenOnShow()
         
-        self._RegenerateMenu()
+        self.setIcon( _GetTrayIcon() )
         
-    
-    def _ClickActivated( self, activation_reason ):
-        
-        # if we click immediately, some users get frozen ui, I assume a mix-up with the icon being destroyed during the same click event or similar
-        
-        QP.CallAfter( self._WasActivated, activation_reason )
-        
-    
-    def _RegenerateMenu( self ):
+        self.activated.connect( self._ClickActivated )
         
         # I'm not a qwidget, but a qobject, so use my parent for this
         parent_widget = self.parent()
         
-        new_menu = ClientGUIMenus.GenerateMenu( parent_widget )
+        self._menu = ClientGUIMenus.GenerateMenu( parent_widget )
         
-        self._show_hide_menu_item = ClientGUIMenus.AppendMenuItem( new_menu, 'show/hide', 'Hide or show the hydrus client', self.flip_show_ui.emit )
+        self._show_hide_menu_item = ClientGUIMenus.AppendMenuItemForSignal( self._menu, 'show/hide', 'Hide or show the hydrus client', self.flip_show_ui )
         
-        self._minimise_restore_menu_item = ClientGUIMenus.AppendMenuItem( new_menu, 'restore/minimise', 'Restore or minimise the hydrus client window', self.flip_minimise_ui.emit )
+        self._minimise_restore_menu_item = ClientGUIMenus.AppendMenuItemForSignal( self._menu, 'restore/minimise', 'Restore or minimise the hydrus client window', self.flip_minimise_ui )
         
-        self._UpdateShowHideMenuItemLabel()
+        ClientGUIMenus.AppendSeparator( self._menu )
         
-        ClientGUIMenus.AppendSeparator( new_menu )
+        self._network_traffic_menu_item = ClientGUIMenus.AppendMenuItemForSignal( self._menu, 'network traffic', 'Pause/resume network traffic', self.flip_pause_network_jobs )
         
-        self._network_traffic_menu_item = ClientGUIMenus.AppendMenuItem( new_menu, 'network traffic', 'Pause/resume network traffic', self.flip_pause_network_jobs.emit )
+        self._subscriptions_paused_menu_item = ClientGUIMenus.AppendMenuItemForSignal( self._menu, 'subscriptions', 'Pause/resume subscriptions', self.flip_pause_subscription_jobs )
         
-        self._UpdateNetworkTrafficMenuItemLabel()
+        ClientGUIMenus.AppendSeparator( self._menu )
         
-        self._subscriptions_paused_menu_item = ClientGUIMenus.AppendMenuItem( new_menu, 'subscriptions', 'Pause/resume subscriptions', self.flip_pause_subscription_jobs.emit )
+        ClientGUIMenus.AppendMenuItemForSignal( self._menu, 'exit', 'Close the hydrus client', self.exit_client )
         
-        self._UpdateSubscriptionsMenuItemLabel()
+        # labels are only worked out when the menu is actually about to pop up, since we flip state far more often than anyone right-clicks us
         
-        ClientGUIMenus.AppendSeparator( new_menu )
+        self._menu.aboutToShow.connect( self._RebuildMenuIfDirty )
         
-        ClientGUIMenus.AppendMenuItem( new_menu, 'exit', 'Close the hydrus client', self.exit_client.emit )
+        self.setContextMenu( self._menu )
         
-        #
-        
-        old_menu = self.contextMenu()
+        self._UpdateTooltip()
         
-        self.setContextMenu( new_menu )
+    
+    def _ApplyLabel( self, menu_item: QW.QAction, kind: str, flag: bool ):
         
-        if old_menu is not None:
+        if self._current_labels.get( kind, None ) != flag:
             
-            ClientGUIMenus.DestroyMenu( old_menu )
+            self._current_labels[ kind ] = flag
+            
+            menu_item.setText( _LABELS[ ( kind, flag ) ] )
             
-        
-        self._UpdateTooltip()
         
     
-    def _UpdateNetworkTrafficMenuItemLabel( self ):
+    def _ClickActivated( self, activation_reason ):
         
-        label = 'unpause network traffic' if self._network_traffic_paused else 'pause network traffic'
+        # if we click immediately, some users get frozen ui, I assume a mix-up with the icon being destroyed during the same click event or similar
         
-        self._network_traffic_menu_item.setText( label )
+        QP.CallAfter( self._WasActivated, activation_reason )
         
     
-    def _UpdateRestoreMinimiseMenuItemLabel( self ):
+    def _RebuildMenuIfDirty( self ):
+        
+        if not self._menu_dirty:
+            
+            return
+            
         
-        label = 'restore' if self._ui_is_currently_minimised else 'minimise'
+        self._menu_dirty = False
         
-        self._minimise_restore_menu_item.setText( label )
+        self._ApplyLabel( self._show_hide_menu_item, 'show', self._ui_is_currently_shown )
+        self._ApplyLabel( self._minimise_restore_menu_item, 'minimise', self._ui_is_currently_minimised )
+        self._ApplyLabel( self._network_traffic_menu_item, 'net', self._network_traffic_paused )
+        self._ApplyLabel( self._subscriptions_paused_menu_item, 'sub', self._subscriptions_paused )
         
         show_it = self._ui_is_currently_shown and not CG.client_controller.new_options.GetBoolean( 'minimise_client_to_system_tray' )
         
         self._minimise_restore_menu_item.setVisible( show_it )
         
     
-    def _UpdateShowHideMenuItemLabel( self ):
+    def _RegenerateMenu( self ):
         
-        label = 'hide' if self._ui_is_currently_shown else 'show'
+        if self._in_batch:
+            
+            self._pending_updates.add( 'menu' )
+            
+            return
+            
         
-        self._show_hide_menu_item.setText( label )
+        # the menu and its actions live as long as we do, so 'regenerating' is just re-handing the same menu to the platform and refreshing labels
         
-        self._UpdateRestoreMinimiseMenuItemLabel()
+        self.setContextMenu( None )
+        self.setContextMenu( self._menu )
         
-    
-    def _UpdateShowSelf( self ) -> bool:
+        self._menu_dirty = True
+        
+        self._RebuildMenuIfDirty()
+        
+        self._UpdateTooltip()
         
-        menu_regenerated = False
+    
+    def _UpdateShowSelf( self ):
         
         should_show = self._should_always_show or not self._ui_is_currently_shown
         
@@ -132,34 +218,41 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             
             self.setVisible( should_show )
             
-            if should_show:
+            if should_show and self._needs_menu_regen_on_show:
                 
-                # apparently context menu needs to be regenerated on re-show
+                # apparently context menu needs to be regenerated on re-show, at least on XEmbed
                 
                 self._RegenerateMenu()
                 
-                menu_regenerated = True
-                
             
         
-        return menu_regenerated
-        
-    
-    def _UpdateSubscriptionsMenuItemLabel( self ):
-        
-        if self._subscriptions_paused_menu_item is not None:
+        if self._deferred_refresh and self.isVisible():
             
-            label = 'unpause subscriptions' if self._subscriptions_paused else 'pause subscriptions'
+            self._deferred_refresh = False
             
-            self._subscriptions_paused_menu_item.setText( label )
+            self._UpdateTooltip()
             
         
     
     def _UpdateTooltip( self ):
         
-        app_display_name = CG.client_controller.new_options.GetString( 'app_display_name' )
+        if self._in_batch:
+            
+            self._pending_updates.add( 'tooltip' )
+            
+            return
+            
+        
+        if not self.isVisible():
+            
+            # nobody can hover over us, so no need to bother the platform tray. we'll catch up when we are shown
+            
+            self._deferred_refresh = True
+            
+            return
+            
         
-        tt = app_display_name
+        tt = self._app_display_name
         
         if self._network_traffic_paused:
             
@@ -171,7 +264,10 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             tt = '{} - subscriptions paused'.format( tt )
             
         
-        if self.toolTip != tt:
+        # we remember the raw text ourselves, since toolTip() gives us the wrapped version and can be a platform call
+        if tt != self._last_tooltip:
+            
+            self._last_tooltip = tt
             
             self.setToolTip( ClientGUIFunctions.WrapToolTip( tt ) )
             
@@ -188,20 +284,21 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             
             if self._ui_is_currently_shown:
                 
-                self._just_clicked_to_show = False
+                self._last_click_to_show_timer.invalidate()
                 
                 self.highlight.emit()
                 
             else:
                 
-                self._just_clicked_to_show = True
+                self._last_click_to_show_timer.restart()
                 
                 self.flip_show_ui.emit()
                 
             
         elif activation_reason in ( QW.QSystemTrayIcon.DoubleClick, QW.QSystemTrayIcon.MiddleClick ):
             
-            if activation_reason == QW.QSystemTrayIcon.DoubleClick and self._just_clicked_to_show:
+            # the first click of this double-click probably just showed us, so don't immediately hide again
+            if activation_reason == QW.QSystemTrayIcon.DoubleClick and self._last_click_to_show_timer.isValid() and self._last_click_to_show_timer.elapsed() < QW.QApplication.doubleClickInterval():
                 
                 return
                 
@@ -210,25 +307,102 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             
         
     
+    @contextlib.contextmanager
+    def batch( self ):
+        
+        # the gui tends to assert all our state at once, so let's do the menu and tooltip work once at the end, not once per setter
+        
+        if self._in_batch:
+            
+            yield
+            
+            return
+            
+        
+        self._in_batch = True
+        
+        try:
+            
+            yield
+            
+        finally:
+            
+            self._in_batch = False
+            
+            pending_updates = self._pending_updates
+            
+            self._pending_updates = set()
+            
+            if 'menu' in pending_updates:
+                
+                self._RegenerateMenu() # this does the tooltip too
+                
+            elif 'tooltip' in pending_updates:
+                
+                self._UpdateTooltip()
+                
+            
+        
+    
+    def SetAppDisplayName( self, app_display_name: str ):
+        
+        if app_display_name != self._app_display_name:
+            
+            self._app_display_name = app_display_name
+            
+            self._UpdateTooltip()
+            
+        
+    
     def SetNetworkTrafficPaused( self, network_traffic_paused: bool ):
         
         if network_traffic_paused != self._network_traffic_paused:
             
             self._network_traffic_paused = network_traffic_paused
             
-            self._UpdateNetworkTrafficMenuItemLabel()
+            self._menu_dirty = True
             
             self._UpdateTooltip()
             
         
     
+    def SetState( self, **kwargs ):
+        
+        # the gui asserts all of this on every update, and almost always nothing has changed, so do one quick diff and get out
+        
+        changes = []
+        
+        for ( name, value ) in kwargs.items():
+            
+            ( attribute, setter ) = _STATE_ATTRIBUTES_AND_SETTERS[ name ]
+            
+            if getattr( self, attribute ) != value:
+                
+                changes.append( ( setter, value ) )
+                
+            
+        
+        if len( changes ) == 0:
+            
+            return
+            
+        
+        with self.batch():
+            
+            for ( setter, value ) in changes:
+                
+                getattr( self, setter )( value )
+                
+            
+        
+    
     def SetSubscriptionsPaused( self, subscriptions_paused: bool ):
         
         if subscriptions_paused != self._subscriptions_paused:
             
             self._subscriptions_paused = subscriptions_paused
             
-            self._UpdateSubscriptionsMenuItemLabel()
+            self._menu_dirty = True
             
             self._UpdateTooltip()
             
@@ -240,7 +414,7 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             
             self._ui_is_currently_minimised = ui_is_currently_minimised
             
-            self._UpdateRestoreMinimiseMenuItemLabel()
+            self._menu_dirty = True
             
         
     
@@ -250,16 +424,13 @@ class ClientSystemTrayIcon( QW.QSystemTrayIcon ):
             
             self._ui_is_currently_shown = ui_is_currently_shown
             
-            menu_regenerated = self._UpdateShowSelf()
+            self._UpdateShowSelf()
             
-            if not menu_regenerated:
-                
-                self._UpdateShowHideMenuItemLabel()
-                
+            self._menu_dirty = True
             
             if not self._ui_is_currently_shown:
                 
-                self._just_clicked_to_show = False
+                self._last_click_to_show_timer.invalidate()
                 
             
         
@@ -66,7 +66,18 @@ if HC.PLATFORM_MACOS:
         
     
 
-FRAME_DURATION_60FPS = 1.0 / 60
+FRAME_RATE_60FPS = 60
+FRAME_DURATION_60FPS = 1.0 / FRAME_RATE_60FPS
+
+# hoisted so the membership tests in the command and update handlers are a hash probe, not a fresh tuple each time
+MOVE_LEFT_OR_RIGHT = frozenset( ( CAC.MOVE_LEFT, CAC.MOVE_RIGHT ) )
+MOVE_HOME_OR_END = frozenset( ( CAC.MOVE_HOME, CAC.MOVE_END ) )
+MOVE_PAGE_UP_OR_DOWN = frozenset( ( CAC.MOVE_PAGE_UP, CAC.MOVE_PAGE_DOWN ) )
+FILE_OR_MAPPING_CONTENT_TYPES = frozenset( ( HC.CONTENT_TYPE_FILES, HC.CONTENT_TYPE_MAPPINGS ) )
+DELETE_PENDING_OR_RESET_SERVICE_UPDATES = frozenset( ( HC.SERVICE_UPDATE_DELETE_PENDING, HC.SERVICE_UPDATE_RESET ) )
+
+CUSTOM_DUPLICATE_ACTION_CHOICE_TUPLES = tuple( ( HC.duplicate_type_string_lookup[ duplicate_type ], duplicate_type ) for duplicate_type in ( HC.DUPLICATE_BETTER, HC.DUPLICATE_SAME_QUALITY ) )
+CUSTOM_DUPLICATE_ACTION_CHOICE_TUPLES_ADVANCED = CUSTOM_DUPLICATE_ACTION_CHOICE_TUPLES + ( ( HC.duplicate_type_string_lookup[ HC.DUPLICATE_ALTERNATE ], HC.DUPLICATE_ALTERNATE ), )
 
 class ThumbnailWaitingToBeDrawn( object ):
     
@@ -85,12 +96,12 @@ class ThumbnailWaitingToBeDrawn( object ):
         return self._draw_complete
         
     
-    def DrawDue( self ) -> bool:
+    def DrawDue( self, now_precise: float ) -> bool:
         
         return True
         
     
-    def DrawToPainter( self, x: int, y: int, painter: QG.QPainter ):
+    def DrawToPainter( self, x: int, y: int, painter: QG.QPainter, now_precise: float ):
         
         painter.drawImage( x, y, self.bitmap )
         
@@ -102,37 +113,38 @@ class ThumbnailWaitingToBeDrawnAnimated( ThumbnailWaitingToBeDrawn ):
     
     FADE_DURATION_S = 0.5
     
-    def __init__( self, hash, thumbnail, thumbnail_index, bitmap ):
+    def __init__( self, hash, thumbnail, thumbnail_index, bitmap, animation_started_precise = None ):
         
         ThumbnailWaitingToBeDrawn.__init__( self, hash, thumbnail, thumbnail_index, bitmap )
         
         self.num_frames_drawn = 0
         self.num_frames_to_draw = max( int( self.FADE_DURATION_S // FRAME_DURATION_60FPS ), 1 ) 
         
-        opacity_factor = max( 0.05, 1 / ( self.num_frames_to_draw / 3 ) )
+        self._opacity_factor = max( 0.05, 1 / ( self.num_frames_to_draw / 3 ) )
         
-        self.alpha_bmp = QP.AdjustOpacity( self.bitmap, opacity_factor )
+        if animation_started_precise is None:
+            
+            animation_started_precise = HydrusTime.GetNowPrecise()
+            
         
-        self.animation_started_precise = HydrusTime.GetNowPrecise()
+        self.animation_started_precise = animation_started_precise
         
     
-    def _GetNumFramesOutstanding( self ):
+    def _GetNumFramesOutstanding( self, now_precise: float ):
         
-        now_precise = HydrusTime.GetNowPrecise()
-        
-        num_frames_to_now = int( ( now_precise - self.animation_started_precise ) // FRAME_DURATION_60FPS )
+        num_frames_to_now = int( ( now_precise - self.animation_started_precise ) * FRAME_RATE_60FPS )
         
-        return min( num_frames_to_now, self.num_frames_to_draw - self.num_frames_drawn )
+        return min( num_frames_to_now - self.num_frames_drawn, self.num_frames_to_draw - self.num_frames_drawn )
         
     
-    def DrawDue( self ) -> bool:
+    def DrawDue( self, now_precise: float ) -> bool:
         
-        return self._GetNumFramesOutstanding() > 0
+        return self._GetNumFramesOutstanding( now_precise ) > 0
         
     
-    def DrawToPainter( self, x: int, y: int, painter: QG.QPainter ):
+    def DrawToPainter( self, x: int, y: int, painter: QG.QPainter, now_precise: float ):
         
-        num_frames_to_draw = self._GetNumFramesOutstanding()
+        num_frames_to_draw = self._GetNumFramesOutstanding( now_precise )
         
         if self.num_frames_drawn + num_frames_to_draw >= self.num_frames_to_draw:
             
@@ -143,10 +155,16 @@ class ThumbnailWaitingToBeDrawnAnimated( ThumbnailWaitingToBeDrawn ):
             
         else:
             
-            for i in range( num_frames_to_draw ):
-                
-                painter.drawImage( x, y, self.alpha_bmp )
-                
+            # n translucent layers stacked on the canvas come out at 1 - ( 1 - a ) ^ n, so we can do it in one blit
+            opacity = 1 - ( ( 1 - self._opacity_factor ) ** num_frames_to_draw )
+            
+            painter.save()
+            
+            painter.setOpacity( opacity )
+            
+            painter.drawImage( x, y, self.bitmap )
+            
+            painter.restore()
             
             self.num_frames_drawn += num_frames_to_draw
             
@@ -180,6 +198,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             CC.COLOUR_THUMB_BORDER_REMOTE_SELECTED : QG.QColor( 227, 66, 52 )
         }
         
+        # the canvas page draw wants this every time, so we resolve it once and clear it when the colours or options change
+        self._thumbgrid_background_colour = None
+        
         self._page_key = page_key
         self._management_controller = management_controller
         
@@ -190,11 +211,39 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         self.setObjectName( 'HydrusMediaList' )
         
+        # selection changes can come in a flurry (shift-select, drag), so we coalesce them and publish once the event loop is free
+        self._publish_selection_change_tags_changed = False
+        
+        self._publish_selection_change_timer = QC.QTimer( self )
+        self._publish_selection_change_timer.setSingleShot( True )
+        self._publish_selection_change_timer.setInterval( 0 )
+        self._publish_selection_change_timer.timeout.connect( self._DoPublishSelectionChange )
+        
+        # and the same for status text when results stream in
+        self._publish_status_text_timer = QC.QTimer( self )
+        self._publish_status_text_timer.setSingleShot( True )
+        self._publish_status_text_timer.setInterval( 0 )
+        self._publish_status_text_timer.timeout.connect( self._DoPublishStatusText )
+        
+        # set-king hotkeys can be hammered, so we gather the hashes and write them in one go
+        # this is a dict used as an ordered set, so a held hotkey only queues each hash once
+        self._pending_king_hashes = {}
+        
+        self._flush_pending_kings_timer = QC.QTimer( self )
+        self._flush_pending_kings_timer.setSingleShot( True )
+        self._flush_pending_kings_timer.setInterval( 50 )
+        self._flush_pending_kings_timer.timeout.connect( self._FlushPendingKings )
+        
+        # duplicate writes have to hit the db in the order the user made them, but the pair work happens on a worker, so they queue up here on the Qt thread
+        # each entry is a one-item list holding the call that does the write, or None while its worker is still going
+        self._duplicate_write_queue = []
+        self._issuing_duplicate_writes = False
+        
         self.setFrameStyle( QW.QFrame.Panel | QW.QFrame.Sunken )
         self.setLineWidth( 2 )
         
         self.resize( QC.QSize( 20, 20 ) )
-        self.setWidget( QW.QWidget( self ) )
+        self.setWidget( self._InnerWidget( self ) )
         self.setWidgetResizable( True )
         
         self._UpdateBackgroundColour()
@@ -202,6 +251,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         self.verticalScrollBar().setSingleStep( 50 )
         
         self._focused_media = None
+        self._focused_hash = None
         self._last_hit_media = None
         self._next_best_media_if_focuses_removed = None
         self._shift_select_started_with_this_media = None
@@ -209,19 +259,71 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         self._empty_page_status_override = None
         
-        CG.client_controller.sub( self, 'AddMediaResults', 'add_media_results' )
-        CG.client_controller.sub( self, 'RemoveMedia', 'remove_media' )
-        CG.client_controller.sub( self, '_UpdateBackgroundColour', 'notify_new_colourset' )
-        CG.client_controller.sub( self, 'SelectByTags', 'select_files_with_tags' )
-        CG.client_controller.sub( self, 'LaunchMediaViewerOnFocus', 'launch_media_viewer' )
+        self._media_to_redraw_when_shown = set()
+        
+        # status bar sums, memoised until media, selection, or file info changes
+        self._aggregate_version = 0
+        self._aggregate_cache = {}
+        
+        self._selection_version = 0
+        self._file_filter_cache = {}
+        
+        self._status_text_cache = None
+        self._selected_flat_media_cache = None
+        self._selected_hashes_cache = ( None, {} )
+        self._tags_media_cache = ( None, [] )
+        
+        # the plain no-argument actions, so the busy ones (archive/delete spam) don't have to run down the whole if chain
+        self._simple_actions_to_callables = {
+            CAC.SIMPLE_DUPLICATE_MEDIA_CLEAR_FOCUSED_FALSE_POSITIVES : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.ClearFalsePositives ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_FOCUSED_ALTERNATE_GROUP : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.DissolveAlternateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_FOCUSED_DUPLICATE_GROUP : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.DissolveDuplicateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_FROM_ALTERNATE_GROUP : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.RemoveFromAlternateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_FROM_DUPLICATE_GROUP : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.RemoveFromDuplicateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_RESET_FOCUSED_POTENTIAL_SEARCH : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.ResetPotentialSearch ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_POTENTIALS : lambda: self._CallWithFocusedHash( ClientGUIDuplicates.RemovePotentials ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_CLEAR_FALSE_POSITIVES : lambda: self._CallWithSelectedHashes( ClientGUIDuplicates.ClearFalsePositives ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_ALTERNATE_GROUP : lambda: self._CallWithSelectedHashes( ClientGUIDuplicates.DissolveAlternateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_DUPLICATE_GROUP : lambda: self._CallWithSelectedHashes( ClientGUIDuplicates.DissolveDuplicateGroup ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_RESET_POTENTIAL_SEARCH : lambda: self._CallWithSelectedHashes( ClientGUIDuplicates.ResetPotentialSearch ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_POTENTIALS : lambda: self._CallWithSelectedHashes( ClientGUIDuplicates.RemovePotentials ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_ALTERNATE : lambda: self._SetDuplicates( HC.DUPLICATE_ALTERNATE ),
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_ALTERNATE_COLLECTIONS : self._SetCollectionsAsAlternate,
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_CUSTOM : self._SetDuplicatesCustom,
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_FOCUSED_BETTER : self._SetDuplicatesFocusedBetter,
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_FOCUSED_KING : self._SetDuplicatesFocusedKing,
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_POTENTIAL : self._SetDuplicatesPotential,
+            CAC.SIMPLE_DUPLICATE_MEDIA_SET_SAME_QUALITY : lambda: self._SetDuplicates( HC.DUPLICATE_SAME_QUALITY ),
+            CAC.SIMPLE_MANAGE_FILE_RATINGS : self._ManageRatings,
+            CAC.SIMPLE_MANAGE_FILE_TAGS : self._ManageTags,
+            CAC.SIMPLE_MANAGE_FILE_URLS : self._ManageURLs,
+            CAC.SIMPLE_MANAGE_FILE_NOTES : self._ManageNotes,
+            CAC.SIMPLE_MANAGE_FILE_TIMESTAMPS : self._ManageTimestamps,
+            CAC.SIMPLE_OPEN_KNOWN_URL : self._OpenKnownURL,
+            CAC.SIMPLE_ARCHIVE_FILE : self._Archive,
+            CAC.SIMPLE_DELETE_FILE : self._Delete,
+            CAC.SIMPLE_UNDELETE_FILE : self._Undelete,
+            CAC.SIMPLE_INBOX_FILE : self._Inbox,
+            CAC.SIMPLE_REMOVE_FILE_FROM_VIEW : lambda: self._Remove( ClientMediaFileFilter.FileFilter( ClientMediaFileFilter.FILE_FILTER_SELECTED ) ),
+            CAC.SIMPLE_LAUNCH_MEDIA_VIEWER : self._LaunchMediaViewer,
+            CAC.SIMPLE_OPEN_SELECTION_IN_NEW_PAGE : self._ShowSelectionInNewPage,
+            CAC.SIMPLE_LAUNCH_THE_ARCHIVE_DELETE_FILTER : self._ArchiveDeleteFilter,
+            CAC.SIMPLE_MAC_QUICKLOOK : self._MacQuicklook
+        }
+        
+        self._Subscribe( 'AddMediaResults', 'add_media_results' )
+        self._Subscribe( 'RemoveMedia', 'remove_media' )
+        self._Subscribe( '_UpdateBackgroundColour', 'notify_new_colourset' )
+        self._Subscribe( 'SelectByTags', 'select_files_with_tags' )
+        self._Subscribe( 'LaunchMediaViewerOnFocus', 'launch_media_viewer' )
+        self._Subscribe( 'NotifyNewOptions', 'notify_new_options' )
+        
+        self.NotifyNewOptions()
         
         self._had_changes_to_tag_presentation_while_hidden = False
         
         self._my_shortcut_handler = ClientGUIShortcuts.ShortcutsHandler( self, [ 'media', 'thumbnails' ] )
         
-        self.setWidget( self._InnerWidget( self ) )
-        self.setWidgetResizable( True )
-        
     
     def __bool__( self ):
         
@@ -278,6 +380,31 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         
     
+    def _CallWithFocusedHash( self, func ):
+        
+        hash = self._GetFocusedHash()
+        
+        if hash is not None:
+            
+            # these are all duplicate actions, so any set-king we are holding on to, and any pair work still going, has to get to the db first
+            self._FlushPendingKings()
+            
+            self._DoDuplicateWrite( lambda: func( self, ( hash, ) ) )
+            
+        
+    
+    def _CallWithSelectedHashes( self, func ):
+        
+        hashes = self._GetSelectedHashes()
+        
+        if len( hashes ) > 0:
+            
+            self._FlushPendingKings()
+            
+            self._DoDuplicateWrite( lambda: func( self, hashes ) )
+            
+        
+    
     def _ClearDeleteRecord( self ):
         
         media = self._GetSelectedFlatMedia()
@@ -300,13 +427,13 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             
         
-        media_to_delete = ClientMedia.FlattenMedia( self._selected_media )
-        
-        if only_those_in_file_service_key is not None:
+        if only_those_in_file_service_key is None:
+            
+            media_to_delete = ClientMedia.FlattenMedia( self._selected_media )
             
-            media_to_delete = ClientMedia.FlattenMedia( media_to_delete )
+        else:
             
-            media_to_delete = [ m for m in media_to_delete if only_those_in_file_service_key in m.GetLocationsManager().GetCurrent() ]
+            media_to_delete = [ m for m in ClientMedia.FlattenMedia( self._selected_media ) if only_those_in_file_service_key in m.GetLocationsManager().GetCurrent() ]
             
         
         if file_service_key is None or CG.client_controller.services_manager.GetServiceType( file_service_key ) in HC.LOCAL_FILE_SERVICES:
@@ -334,6 +461,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         def do_it( content_update_packages ):
             
+            # the delete dialog hands us a package per 64 files, so merge runs of them to save db round-trips but keep each transaction modest
+            content_update_packages = ClientContentUpdates.ContentUpdatePackage.STATICMergeContentUpdatePackages( content_update_packages, 16 )
+            
             for content_update_package in content_update_packages:
                 
                 CG.client_controller.WriteSynchronous( 'content_updates', content_update_package )
@@ -345,27 +475,119 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _DeselectSelect( self, media_to_deselect, media_to_select ):
         
+        selected_aggregates = self._GetCachedAggregates( True )
+        
+        actually_deselected = []
+        actually_selected = []
+        
         if len( media_to_deselect ) > 0:
             
+            actually_deselected = [ m for m in media_to_deselect if m in self._selected_media ]
+            
             for m in media_to_deselect: m.Deselect()
             
-            self._RedrawMedia( media_to_deselect )
+            self._RedrawMediaWhenVisible( media_to_deselect )
             
             self._selected_media.difference_update( media_to_deselect )
             
         
         if len( media_to_select ) > 0:
             
+            actually_selected = [ m for m in media_to_select if m not in self._selected_media ]
+            
             for m in media_to_select: m.Select()
             
-            self._RedrawMedia( media_to_select )
+            self._RedrawMediaWhenVisible( media_to_select )
             
             self._selected_media.update( media_to_select )
             
         
+        self._selection_version += 1
+        
+        # apply the delta when it is smaller than a rescan would be, otherwise let the next status call recount
+        if selected_aggregates is not None and len( actually_deselected ) + len( actually_selected ) < len( self._selected_media ):
+            
+            self._AccumulateAggregates( selected_aggregates, actually_deselected, direction = -1 )
+            self._AccumulateAggregates( selected_aggregates, actually_selected )
+            
+            self._SetCachedAggregates( True, selected_aggregates )
+            
+        else:
+            
+            self._aggregate_cache.pop( True, None )
+            
+        
         self._PublishSelectionChange()
         
     
+    def _DirtyAggregates( self ):
+        
+        self._aggregate_version += 1
+        
+    
+    def _DoDuplicateWrite( self, write_callable ):
+        
+        # this goes straight away unless some earlier pair work is still on its worker
+        self._duplicate_write_queue.append( [ write_callable ] )
+        
+        self._IssueDuplicateWrites()
+        
+    
+    def _DoPublishSelectionChange( self ):
+        
+        tags_changed = self._publish_selection_change_tags_changed
+        
+        self._publish_selection_change_tags_changed = False
+        
+        if CG.client_controller.gui.IsCurrentPage( self._page_key ):
+            
+            # a big page publishes often with no real change (a focus click, a status refresh), so reuse the last list if we can
+            # the tag list only reads this, so sharing it between emits is fine
+            tags_media_cache_key = ( self._selection_version, self._media_list_version, self._aggregate_version )
+            
+            ( cached_key, tags_media ) = self._tags_media_cache
+            
+            if cached_key != tags_media_cache_key:
+                
+                if len( self._selected_media ) == 0:
+                    
+                    tags_media = list( self._sorted_media )
+                    
+                else:
+                    
+                    tags_media = list( self._selected_media )
+                    
+                
+                self._tags_media_cache = ( tags_media_cache_key, tags_media )
+                
+            
+            tags_changed = tags_changed or self._had_changes_to_tag_presentation_while_hidden
+            
+            self.selectedMediaTagPresentationChanged.emit( tags_media, tags_changed )
+            
+            self._publish_status_text_timer.stop()
+            
+            self.statusTextChanged.emit( self._GetPrettyStatusForStatusBar() )
+            
+            if tags_changed:
+                
+                self._had_changes_to_tag_presentation_while_hidden = False
+                
+            
+        elif tags_changed:
+            
+            self._had_changes_to_tag_presentation_while_hidden = True
+            
+        
+    
+    def _DoPublishStatusText( self ):
+        
+        if CG.client_controller.gui.IsCurrentPage( self._page_key ):
+            
+            self.statusTextChanged.emit( self._GetPrettyStatusForStatusBar() )
+            
+        
+    
     def _DownloadSelected( self ):
         
         hashes = self._GetSelectedHashes( discriminant = CC.DISCRIMINANT_NOT_LOCAL )
@@ -384,6 +606,77 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         self._media_added_in_current_shift_select = set()
         
     
+    def _FlushPendingKings( self ):
+        
+        self._flush_pending_kings_timer.stop()
+        
+        if len( self._pending_king_hashes ) == 0:
+            
+            return
+            
+        
+        hashes = tuple( self._pending_king_hashes )
+        
+        self._pending_king_hashes = {}
+        
+        self._DoDuplicateWrite( lambda: CG.client_controller.Write( 'duplicate_set_kings', hashes ) )
+        
+    
+    def _GetFileFilterResult( self, file_filter: ClientMediaFileFilter.FileFilter, want_hashes = False ):
+        
+        # a repeat 'select inbox' or similar on a big page shouldn't have to walk every media again
+        # the key covers the media list version and the version that content updates bump, so any change to the media misses
+        
+        if file_filter.DependsOnSelection():
+            
+            selection_version = self._selection_version
+            
+        else:
+            
+            selection_version = None
+            
+        
+        cache_key = ( file_filter.GetCacheKey(), want_hashes, self._media_list_version, self._aggregate_version, selection_version )
+        
+        if cache_key not in self._file_filter_cache:
+            
+            # select wants the media and remove wants the hashes, so we only run the filter for the one we were asked for
+            if want_hashes:
+                
+                result = frozenset( file_filter.GetMediaListHashes( self ) )
+                
+            else:
+                
+                result = frozenset( file_filter.GetMediaListMedia( self ) )
+                
+            
+            # only keep results that are still current
+            self._file_filter_cache = { key : value for ( key, value ) in self._file_filter_cache.items() if key[2:4] == cache_key[2:4] }
+            
+            self._file_filter_cache[ cache_key ] = result
+            
+        
+        return self._file_filter_cache[ cache_key ]
+        
+    
+    def _GetFocusedHash( self ) -> typing.Optional[ bytes ]:
+        
+        # a singleton's hash never changes, so we cache it on focus. a collection's display media can, so we look that up live
+        if self._focused_hash is not None:
+            
+            return self._focused_hash
+            
+        
+        try:
+            
+            return self._GetFocusSingleton().GetHash()
+            
+        except HydrusExceptions.DataMissing:
+            
+            return None
+            
+        
+    
     def _GetFocusSingleton( self ) -> ClientMedia.MediaSingleton:
         
         if self._focused_media is not None:
@@ -414,18 +707,141 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             if len( self._selected_media ) > 0:
                 
-                medias = self._GetSelectedMediaOrdered()
-                
-                return ClientMedia.FlattenMedia( medias )
+                return self._GetSelectedFlatMediaOrdered()
                 
             
         
         return []
         
     
+    def _AccumulateAggregates( self, aggregates, medias, direction = 1 ):
+        
+        aggregates[ 'filetype_summary' ] = None
+        
+        mimes = aggregates[ 'mimes' ]
+        
+        for media in medias:
+            
+            aggregates[ 'num_medias' ] += direction
+            aggregates[ 'num_files' ] += direction * media.GetNumFiles()
+            aggregates[ 'num_inbox' ] += direction * media.GetNumInbox()
+            aggregates[ 'total_size' ] += direction * media.GetSize()
+            
+            if not media.IsSizeDefinite():
+                
+                aggregates[ 'num_size_indefinite' ] += direction
+                
+            
+            if media.HasDuration():
+                
+                aggregates[ 'total_duration_ms' ] += direction * media.GetDurationMS()
+                
+            else:
+                
+                aggregates[ 'num_without_duration' ] += direction
+                
+            
+            mime = media.GetMime()
+            
+            mimes[ mime ] += direction
+            
+            if mime == HC.APPLICATION_HYDRUS_CLIENT_COLLECTION:
+                
+                aggregates[ 'num_collections' ] += direction
+                
+            
+        
+    
+    def _GetAggregates( self, only_selected = False ):
+        
+        aggregates = self._GetCachedAggregates( only_selected )
+        
+        if aggregates is None:
+            
+            aggregates = self._GetMediaAggregates( self._GetAggregatesMediaSource( only_selected ) )
+            
+            self._SetCachedAggregates( only_selected, aggregates )
+            
+        
+        return aggregates
+        
+    
+    def _GetAggregatesCacheKey( self, only_selected ):
+        
+        # the media list version covers add/remove/collect, the selection version covers select/deselect, and the aggregate version covers info changes
+        if only_selected:
+            
+            return ( self._selection_version, self._media_list_version, self._aggregate_version )
+            
+        else:
+            
+            return ( self._media_list_version, self._aggregate_version )
+            
+        
+    
+    def _GetAggregatesFiletypeSummary( self, aggregates ):
+        
+        # the string only changes when the counts do, and most status refreshes are selection-only
+        if aggregates[ 'filetype_summary' ] is None:
+            
+            mimes = [ mime for ( mime, count ) in aggregates[ 'mimes' ].items() if count > 0 ]
+            
+            aggregates[ 'filetype_summary' ] = ClientMedia.GetFiletypeSummaryString( aggregates[ 'num_medias' ], aggregates[ 'num_files' ], mimes, aggregates[ 'num_collections' ] )
+            
+        
+        return aggregates[ 'filetype_summary' ]
+        
+    
+    def _GetAggregatesMediaSource( self, only_selected ):
+        
+        if only_selected:
+            
+            return self._selected_media
+            
+        else:
+            
+            return self._sorted_media
+            
+        
+    
+    def _GetCachedAggregates( self, only_selected ):
+        
+        if only_selected in self._aggregate_cache:
+            
+            ( cached_key, aggregates ) = self._aggregate_cache[ only_selected ]
+            
+            if cached_key == self._GetAggregatesCacheKey( only_selected ):
+                
+                return aggregates
+                
+            
+        
+        return None
+        
+    
+    def _GetMediaAggregates( self, medias ):
+        
+        aggregates = {
+            'num_medias' : 0,
+            'num_files' : 0,
+            'num_inbox' : 0,
+            'total_size' : 0,
+            'num_size_indefinite' : 0,
+            'total_duration_ms' : 0,
+            'num_without_duration' : 0,
+            'mimes' : collections.Counter(),
+            'num_collections' : 0,
+            'filetype_summary' : None
+        }
+        
+        self._AccumulateAggregates( aggregates, medias )
+        
+        return aggregates
+        
+    
     def _GetNumSelected( self ):
         
-        return sum( [ media.GetNumFiles() for media in self._selected_media ] )
+        return self._GetAggregates( only_selected = True )[ 'num_files' ]
         
     
     def _GetPrettyStatusForStatusBar( self ) -> str:
@@ -446,10 +862,26 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             
         
-        num_selected = self._GetNumSelected()
+        # several publishes can ask for this per user action, so only rebuild it when the media, selection, or their info has changed
+        status_text_cache_key = ( num_files, self._selection_version, self._GetAggregatesCacheKey( False ), self._GetAggregatesCacheKey( True ) )
         
-        num_files_string = ClientMedia.GetMediasFiletypeSummaryString( self._sorted_media )
-        selected_files_string = ClientMedia.GetMediasFiletypeSummaryString( self._selected_media )
+        if self._status_text_cache is not None:
+            
+            ( cached_key, cached_status_text ) = self._status_text_cache
+            
+            if cached_key == status_text_cache_key:
+                
+                return cached_status_text
+                
+            
+        
+        all_aggregates = self._GetAggregates()
+        selected_aggregates = self._GetAggregates( only_selected = True )
+        
+        num_selected = selected_aggregates[ 'num_files' ]
+        
+        num_files_string = self._GetAggregatesFiletypeSummary( all_aggregates )
+        selected_files_string = self._GetAggregatesFiletypeSummary( selected_aggregates )
         
         s = num_files_string # 23 files
         
@@ -489,7 +921,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             else: # 23 files - 5 selected, selection_info
                 
-                num_inbox = sum( ( media.GetNumInbox() for media in self._selected_media ) )
+                num_inbox = selected_aggregates[ 'num_inbox' ]
                 
                 if num_inbox == num_selected:
                     
@@ -517,44 +949,30 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             
         
+        self._status_text_cache = ( status_text_cache_key, s )
+        
         return s
         
     
     def _GetPrettyTotalDuration( self, only_selected = False ):
         
-        if only_selected:
-            
-            media_source = self._selected_media
-            
-        else:
-            
-            media_source = self._sorted_media
-            
+        aggregates = self._GetAggregates( only_selected = only_selected )
         
-        if len( media_source ) == 0 or False in ( media.HasDuration() for media in media_source ):
+        if aggregates[ 'num_medias' ] == 0 or aggregates[ 'num_without_duration' ] > 0:
             
             return ''
             
         
-        total_duration = sum( ( media.GetDurationMS() for media in media_source ) )
-        
-        return HydrusTime.MillisecondsDurationToPrettyTime( total_duration )
+        return HydrusTime.MillisecondsDurationToPrettyTime( aggregates[ 'total_duration_ms' ] )
         
     
     def _GetPrettyTotalSize( self, only_selected = False ):
         
-        if only_selected:
-            
-            media_source = self._selected_media
-            
-        else:
-            
-            media_source = self._sorted_media
-            
+        aggregates = self._GetAggregates( only_selected = only_selected )
         
-        total_size = sum( [ media.GetSize() for media in media_source ] )
+        total_size = aggregates[ 'total_size' ]
         
-        unknown_size = False in ( media.IsSizeDefinite() for media in media_source )
+        unknown_size = aggregates[ 'num_size_indefinite' ] > 0
         
         if total_size == 0:
             
@@ -582,31 +1000,55 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _GetSelectedHashes( self, is_in_file_service_key = None, discriminant = None, is_not_in_file_service_key = None, ordered = False ):
         
-        if ordered:
+        # the petition/rescind/upload actions tend to ask for the same thing several times in a row
+        # ordered results follow sorted_media, so a sort or a rearrange has to miss too
+        selection_key = ( self._selection_version, self._media_list_version, self._aggregate_version )
+        
+        filter_key = ( is_in_file_service_key, discriminant, is_not_in_file_service_key, ordered )
+        
+        ( cached_selection_key, filter_keys_to_hashes ) = self._selected_hashes_cache
+        
+        if cached_selection_key != selection_key:
             
-            result = []
+            filter_keys_to_hashes = {}
             
-            for media in self._GetSelectedMediaOrdered():
-                
-                result.extend( media.GetHashes( is_in_file_service_key, discriminant, is_not_in_file_service_key, ordered ) )
-                
+            self._selected_hashes_cache = ( selection_key, filter_keys_to_hashes )
             
-        else:
+        
+        if filter_key not in filter_keys_to_hashes:
             
-            result = set()
+            hashes = self._IterSelectedHashes( is_in_file_service_key, discriminant, is_not_in_file_service_key, ordered )
             
-            for media in self._selected_media:
+            if ordered:
                 
-                result.update( media.GetHashes( is_in_file_service_key, discriminant, is_not_in_file_service_key, ordered ) )
+                hashes = tuple( hashes )
+                
+            else:
+                
+                hashes = frozenset( hashes )
                 
             
+            filter_keys_to_hashes[ filter_key ] = hashes
+            
         
-        return result
+        hashes = filter_keys_to_hashes[ filter_key ]
+        
+        # callers are free to edit what they get
+        if ordered:
+            
+            return list( hashes )
+            
+        else:
+            
+            return set( hashes )
+            
         
     
     def _GetSelectedCollections( self ):
         
-        sorted_selected_collections = [ media for media in self._sorted_media if media.IsCollection() and media in self._selected_media ]
+        selected_collections = [ media for media in self._selected_media if media.IsCollection() ]
+        
+        sorted_selected_collections = sorted( selected_collections, key = self._sorted_media.index )
         
         return sorted_selected_collections
         
@@ -615,115 +1057,57 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         # this now always delivers sorted results
         
-        sorted_selected_media = [ media for media in self._sorted_media if media in self._selected_media ]
-        
-        flat_media = ClientMedia.FlattenMedia( sorted_selected_media )
+        flat_media = self._GetSelectedFlatMediaOrdered()
         
         flat_media = [ media for media in flat_media if media.MatchesDiscriminant( is_in_file_service_key = is_in_file_service_key, discriminant = discriminant, is_not_in_file_service_key = is_not_in_file_service_key ) ]
         
         return flat_media
         
     
-    def _GetSelectedMediaOrdered( self ):
+    def _GetSelectedFlatMediaOrdered( self ):
         
-        # note that this is fast because sorted_media is custom
-        return sorted( self._selected_media, key = lambda m: self._sorted_media.index( m ) )
+        # the manage dialogs and duplicate actions often get called one after another on the same selection
+        # the media list version catches sorts and rearranges, which change the order without changing the container
+        cache_key = ( self._selection_version, self._media_list_version, self._aggregate_version )
         
-    
-    def _GetSortedSelectedMimeDescriptors( self ):
-        
-        def GetDescriptor( plural, classes, num_collections ):
+        if self._selected_flat_media_cache is None or self._selected_flat_media_cache[0] != cache_key:
             
-            suffix = 's' if plural else ''
+            flat_media = ClientMedia.FlattenMedia( self._GetSelectedMediaOrdered() )
             
-            if len( classes ) == 0:
-                
-                return 'file' + suffix
-                
-            
-            if len( classes ) == 1:
-                
-                ( mime, ) = classes
-                
-                if mime == HC.APPLICATION_HYDRUS_CLIENT_COLLECTION:
-                    
-                    collections_suffix = 's' if num_collections > 1 else ''
-                    
-                    return 'file{} in {} collection{}'.format( suffix, HydrusNumbers.ToHumanInt( num_collections ), collections_suffix )
-                    
-                else:
-                    
-                    return HC.mime_string_lookup[ mime ] + suffix
-                    
-                
-            
-            if len( classes.difference( HC.IMAGES ) ) == 0:
-                
-                return 'image' + suffix
-                
-            elif len( classes.difference( HC.ANIMATIONS ) ) == 0:
-                
-                return 'animation' + suffix
-                
-            elif len( classes.difference( HC.VIDEO ) ) == 0:
-                
-                return 'video' + suffix
-                
-            elif len( classes.difference( HC.AUDIO ) ) == 0:
-                
-                return 'audio file' + suffix
-                
-            else:
-                
-                return 'file' + suffix
-                
+            self._selected_flat_media_cache = ( cache_key, flat_media )
             
         
-        if len( self._sorted_media ) > 1000:
-            
-            sorted_mime_descriptor = 'files'
-            
-        else:
-            
-            sorted_mimes = { media.GetMime() for media in self._sorted_media }
-            
-            if HC.APPLICATION_HYDRUS_CLIENT_COLLECTION in sorted_mimes:
-                
-                num_collections = len( [ media for media in self._sorted_media if isinstance( media, ClientMedia.MediaCollection ) ] )
-                
-            else:
-                
-                num_collections = 0
-                
-            
-            plural = len( self._sorted_media ) > 1 or sum( ( m.GetNumFiles() for m in self._sorted_media ) ) > 1
-            
-            sorted_mime_descriptor = GetDescriptor( plural, sorted_mimes, num_collections )
-            
+        # callers may hang on to or edit this, so they get their own copy
+        return list( self._selected_flat_media_cache[1] )
         
-        if len( self._selected_media ) > 1000:
-            
-            selected_mime_descriptor = 'files'
-            
-        else:
-            
-            selected_mimes = { media.GetMime() for media in self._selected_media }
+    
+    def _GetSelectedMediaIndexRange( self ):
+        
+        # when we only need the ends, a min/max over the indices is cheaper than sorting the whole selection
+        indices = [ self._sorted_media.index( media ) for media in self._selected_media ]
+        
+        if len( indices ) == 0:
             
-            if HC.APPLICATION_HYDRUS_CLIENT_COLLECTION in selected_mimes:
-                
-                num_collections = len( [ media for media in self._selected_media if isinstance( media, ClientMedia.MediaCollection ) ] )
-                
-            else:
-                
-                num_collections = 0
-                
+            raise HydrusExceptions.DataMissing( 'Nothing selected!' )
             
-            plural = len( self._selected_media ) > 1 or sum( ( m.GetNumFiles() for m in self._selected_media ) ) > 1
+        
+        return ( min( indices ), max( indices ) )
+        
+    
+    def _GetSelectedMediaOrdered( self ):
+        
+        # note that this is fast because sorted_media is custom and keeps an item->index dict
+        return sorted( self._selected_media, key = self._sorted_media.index )
+        
+    
+    def _GetThumbgridBackgroundColour( self ) -> QG.QColor:
+        
+        if self._thumbgrid_background_colour is None:
             
-            selected_mime_descriptor = GetDescriptor( plural, selected_mimes, num_collections )
+            self._thumbgrid_background_colour = self.GetColour( CC.COLOUR_THUMBGRID_BACKGROUND )
             
         
-        return ( sorted_mime_descriptor, selected_mime_descriptor )
+        return self._thumbgrid_background_colour
         
     
     def _HasFocusSingleton( self ) -> bool:
@@ -772,9 +1156,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                     
                     focus_it = False
                     
-                    if CG.client_controller.new_options.GetBoolean( 'focus_preview_on_ctrl_click' ):
+                    if self._focus_preview_on_ctrl_click:
                         
-                        if CG.client_controller.new_options.GetBoolean( 'focus_preview_on_ctrl_click_only_static' ):
+                        if self._focus_preview_on_ctrl_click_only_static:
                             
                             focus_it = media.GetDurationMS() is None
                             
@@ -804,15 +1188,28 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 if start_index < end_index:
                     
-                    media_from_start_of_shift_to_end = set( self._sorted_media[ start_index : end_index + 1 ] )
+                    media_from_start_of_shift_to_end = self._sorted_media[ start_index : end_index + 1 ]
                     
                 else:
                     
-                    media_from_start_of_shift_to_end = set( self._sorted_media[ end_index : start_index + 1 ] )
+                    media_from_start_of_shift_to_end = self._sorted_media[ end_index : start_index + 1 ]
                     
                 
-                media_to_deselect = [ m for m in self._media_added_in_current_shift_select if m not in media_from_start_of_shift_to_end ]
-                media_to_select = [ m for m in media_from_start_of_shift_to_end if not m.IsSelected() ]
+                # the selected set is the source of truth for IsSelected, and a set lookup beats a method call per thumb
+                selected_media = self._selected_media
+                
+                media_to_select = [ m for m in media_from_start_of_shift_to_end if m not in selected_media ]
+                
+                if len( self._media_added_in_current_shift_select ) > 0:
+                    
+                    media_from_start_of_shift_to_end = set( media_from_start_of_shift_to_end )
+                    
+                    media_to_deselect = [ m for m in self._media_added_in_current_shift_select if m not in media_from_start_of_shift_to_end ]
+                    
+                else:
+                    
+                    media_to_deselect = []
+                    
                 
                 self._media_added_in_current_shift_select.difference_update( media_to_deselect )
                 self._media_added_in_current_shift_select.update( media_to_select )
@@ -821,9 +1218,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 focus_it = False
                 
-                if CG.client_controller.new_options.GetBoolean( 'focus_preview_on_shift_click' ):
+                if self._focus_preview_on_shift_click:
                     
-                    if CG.client_controller.new_options.GetBoolean( 'focus_preview_on_shift_click_only_static' ):
+                    if self._focus_preview_on_shift_click_only_static:
                         
                         focus_it = media.GetDurationMS() is None
                         
@@ -884,6 +1281,73 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         
     
+    def _IssueDuplicateWrites( self ):
+        
+        # a duplicate action can open a dialog, and pair work finishing during that would get in here again, so the outer call does the whole queue
+        if self._issuing_duplicate_writes:
+            
+            return
+            
+        
+        self._issuing_duplicate_writes = True
+        
+        try:
+            
+            while len( self._duplicate_write_queue ) > 0 and self._duplicate_write_queue[0][0] is not None:
+                
+                ( write_callable, ) = self._duplicate_write_queue.pop( 0 )
+                
+                write_callable()
+                
+            
+        finally:
+            
+            self._issuing_duplicate_writes = False
+            
+        
+    
+    def _IterSelectedHashes( self, is_in_file_service_key, discriminant, is_not_in_file_service_key, ordered ):
+        
+        no_filter = is_in_file_service_key is None and discriminant is None and is_not_in_file_service_key is None
+        
+        if ordered:
+            
+            medias = self._GetSelectedMediaOrdered()
+            
+        else:
+            
+            medias = self._selected_media
+            
+        
+        for media in medias:
+            
+            if media.IsCollection():
+                
+                if no_filter:
+                    
+                    # collections keep their hashes cached, no need to walk them
+                    yield from media.GetHashes( ordered = ordered )
+                    
+                    continue
+                    
+                
+                singletons = media.GetFlatMedia()
+                
+            else:
+                
+                singletons = ( media, )
+                
+            
+            for singleton in singletons:
+                
+                if no_filter or singleton.MatchesDiscriminant( is_in_file_service_key = is_in_file_service_key, discriminant = discriminant, is_not_in_file_service_key = is_not_in_file_service_key ):
+                    
+                    yield singleton.GetHash()
+                    
+                
+            
+        
+    
     def _LaunchMediaViewer( self, first_media = None ):
         
         if self._HasFocusSingleton():
@@ -897,19 +1361,18 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             new_options = CG.client_controller.new_options
             
-            ( media_show_action, media_start_paused, media_start_with_embed ) = new_options.GetMediaShowAction( media.GetMime() )
+            mime = media.GetMime()
+            
+            ( media_show_action, media_start_paused, media_start_with_embed ) = new_options.GetMediaShowAction( mime )
             
             if media_show_action == CC.MEDIA_VIEWER_ACTION_DO_NOT_SHOW_ON_ACTIVATION_OPEN_EXTERNALLY:
                 
                 hash = media.GetHash()
-                mime = media.GetMime()
                 
                 client_files_manager = CG.client_controller.client_files_manager
                 
                 path = client_files_manager.GetFilePath( hash, mime )
                 
-                new_options = CG.client_controller.new_options
-                
                 launch_path = new_options.GetMimeLaunch( mime )
                 
                 HydrusPaths.LaunchFile( path, launch_path )
@@ -971,7 +1434,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _ManageRatings( self ):
         
-        flat_media = ClientMedia.FlattenMedia( self._selected_media )
+        flat_media = self._GetSelectedFlatMediaOrdered()
         
         if len( flat_media ) > 0:
             
@@ -989,7 +1452,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _ManageTags( self ):
         
-        flat_media = ClientMedia.FlattenMedia( self._GetSelectedMediaOrdered() )
+        flat_media = self._GetSelectedFlatMediaOrdered()
         
         if len( flat_media ) > 0:
             
@@ -1013,9 +1476,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _ManageTimestamps( self ):
         
-        ordered_selected_media = self._GetSelectedMediaOrdered()
-        
-        ordered_selected_flat_media = ClientMedia.FlattenMedia( ordered_selected_media )
+        ordered_selected_flat_media = self._GetSelectedFlatMediaOrdered()
         
         if len( ordered_selected_flat_media ) > 0:
             
@@ -1027,7 +1488,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _ManageURLs( self ):
         
-        flat_media = ClientMedia.FlattenMedia( self._selected_media )
+        flat_media = self._GetSelectedFlatMediaOrdered()
         
         if len( flat_media ) > 0:
             
@@ -1067,11 +1528,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         hashes = self._GetSelectedHashes()
         
-        contents = [ HydrusNetwork.Content( HC.CONTENT_TYPE_FILES, ( hash, ) ) for hash in hashes ]
-        
-        if len( contents ) > 0:
+        if len( hashes ) > 0:
             
-            subject_account_identifiers = [ HydrusNetwork.AccountIdentifier( content = content ) for content in contents ]
+            subject_account_identifiers = [ HydrusNetwork.AccountIdentifier( content = HydrusNetwork.Content( HC.CONTENT_TYPE_FILES, ( hash, ) ) ) for hash in hashes ]
             
             frame = ClientGUITopLevelWindowsPanels.FrameThatTakesScrollablePanel( self, 'manage accounts' )
             
@@ -1190,33 +1649,20 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _PublishSelectionChange( self, tags_changed = False ):
         
-        if CG.client_controller.gui.IsCurrentPage( self._page_key ):
-            
-            if len( self._selected_media ) == 0:
-                
-                tags_media = self._sorted_media
-                
-            else:
-                
-                tags_media = self._selected_media
-                
-            
-            tags_media = list( tags_media )
-            
-            tags_changed = tags_changed or self._had_changes_to_tag_presentation_while_hidden
-            
-            self.selectedMediaTagPresentationChanged.emit( tags_media, tags_changed )
-            
-            self.statusTextChanged.emit( self._GetPrettyStatusForStatusBar() )
+        self._publish_selection_change_tags_changed = self._publish_selection_change_tags_changed or tags_changed
+        
+        if tags_changed:
             
-            if tags_changed:
+            # tag floods from content updates arrive over many event loop passes, so let them pile up for a frame
+            # we don't restart a pending timer, or a steady flood would never publish
+            if not self._publish_selection_change_timer.isActive():
                 
-                self._had_changes_to_tag_presentation_while_hidden = False
+                self._publish_selection_change_timer.start( int( FRAME_DURATION_60FPS * 1000 ) )
                 
             
-        elif tags_changed:
+        else:
             
-            self._had_changes_to_tag_presentation_while_hidden = True
+            self._publish_selection_change_timer.start( 0 )
             
         
     
@@ -1228,7 +1674,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             self.selectedMediaTagPresentationIncremented.emit( medias )
             
-            self.statusTextChanged.emit( self._GetPrettyStatusForStatusBar() )
+            self._PublishStatusText()
             
         else:
             
@@ -1236,6 +1682,11 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         
     
+    def _PublishStatusText( self ):
+        
+        self._publish_status_text_timer.start()
+        
+    
     def _RecalculateVirtualSize( self, called_from_resize_event = False ):
         
         pass
@@ -1246,9 +1697,34 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         pass
         
     
+    def _RedrawMediaWhenVisible( self, media ):
+        
+        # a background page doesn't need to redraw now, so we'll catch up when it is shown
+        if self.isVisible():
+            
+            self._RedrawMedia( media )
+            
+        else:
+            
+            self._media_to_redraw_when_shown.update( media )
+            
+        
+    
+    def _RedrawPendingMedia( self ):
+        
+        if len( self._media_to_redraw_when_shown ) > 0:
+            
+            media = self._media_to_redraw_when_shown
+            
+            self._media_to_redraw_when_shown = set()
+            
+            self._RedrawMedia( media )
+            
+        
+    
     def _Remove( self, file_filter: ClientMediaFileFilter.FileFilter ):
         
-        hashes = file_filter.GetMediaListHashes( self )
+        hashes = self._GetFileFilterResult( file_filter, want_hashes = True )
         
         if len( hashes ) > 0:
             
@@ -1256,6 +1732,23 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         
     
+    def _RemoveMediaByHashes( self, hashes ):
+        
+        # collections can lose members without leaving the list, which the length check won't see
+        self._DirtyAggregates()
+        
+        ClientMedia.ListeningMediaList._RemoveMediaByHashes( self, hashes )
+        
+    
+    def _RemoveMediaDirectly( self, singleton_media, collected_media ):
+        
+        # don't hang on to removed media just to redraw it later
+        self._media_to_redraw_when_shown.difference_update( singleton_media )
+        self._media_to_redraw_when_shown.difference_update( collected_media )
+        
+        ClientMedia.ListeningMediaList._RemoveMediaDirectly( self, singleton_media, collected_media )
+        
+    
     def _RegenerateFileData( self, job_type ):
         
         flat_media = self._GetSelectedFlatMedia()
@@ -1264,19 +1757,21 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         if num_files > 0:
             
+            num_files_string = HydrusNumbers.ToHumanInt( num_files )
+            
             if job_type == ClientFiles.REGENERATE_FILE_DATA_JOB_FILE_METADATA:
                 
-                message = 'This will reparse the {} selected files\' metadata.'.format( HydrusNumbers.ToHumanInt( num_files ) )
+                message = 'This will reparse the {} selected files\' metadata.'.format( num_files_string )
                 message += '\n' * 2
                 message += 'If the files were imported before some more recent improvement in the parsing code (such as EXIF rotation or bad video resolution or duration or frame count calculation), this will update them.'
                 
             elif job_type == ClientFiles.REGENERATE_FILE_DATA_JOB_FORCE_THUMBNAIL:
                 
-                message = 'This will force-regenerate the {} selected files\' thumbnails.'.format( HydrusNumbers.ToHumanInt( num_files ) )
+                message = 'This will force-regenerate the {} selected files\' thumbnails.'.format( num_files_string )
                 
             elif job_type == ClientFiles.REGENERATE_FILE_DATA_JOB_REFIT_THUMBNAIL:
                 
-                message = 'This will regenerate the {} selected files\' thumbnails, but only if they are the wrong size.'.format( HydrusNumbers.ToHumanInt( num_files ) )
+                message = 'This will regenerate the {} selected files\' thumbnails, but only if they are the wrong size.'.format( num_files_string )
                 
             else:
                 
@@ -1288,7 +1783,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             if num_files > 50:
                 
                 message += '\n' * 2
-                message += 'You have selected {} files, so this job may take some time. You can run it all now or schedule it to the overall file maintenance queue for later spread-out processing.'.format( HydrusNumbers.ToHumanInt( num_files ) )
+                message += 'You have selected {} files, so this job may take some time. You can run it all now or schedule it to the overall file maintenance queue for later spread-out processing.'.format( num_files_string )
                 
                 yes_tuples = []
                 
@@ -1326,9 +1821,14 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             else:
                 
-                hashes = { media.GetHash() for media in flat_media }
+                def do_it( flat_media, job_type ):
+                    
+                    hashes = { media.GetHash() for media in flat_media }
+                    
+                    CG.client_controller.files_maintenance_manager.ScheduleJob( hashes, job_type )
+                    
                 
-                CG.client_controller.CallToThread( CG.client_controller.files_maintenance_manager.ScheduleJob, hashes, job_type )
+                CG.client_controller.CallToThread( do_it, flat_media, job_type )
                 
             
         
@@ -1362,10 +1862,11 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _Select( self, file_filter: ClientMediaFileFilter.FileFilter ):
         
-        matching_media = file_filter.GetMediaListMedia( self )
+        matching_media = self._GetFileFilterResult( file_filter )
         
-        media_to_deselect = self._selected_media.difference( matching_media )
-        media_to_select = matching_media.difference( self._selected_media )
+        # both sides are real sets here, so plain set algebra is enough
+        media_to_deselect = self._selected_media - matching_media
+        media_to_select = matching_media - self._selected_media
         
         move_focus = self._focused_media in media_to_deselect or self._focused_media is None
         
@@ -1386,29 +1887,29 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 # let's not focus if one of the selectees is already visible
                 
-                media_visible = True in ( self._MediaIsVisible( media ) for media in self._selected_media )
+                media_visible = any( ( self._MediaIsVisible( media ) for media in self._selected_media ) )
                 
                 if not media_visible:
                     
-                    for m in self._sorted_media:
-                        
-                        if m in self._selected_media:
-                            
-                            ctrl = False
-                            shift = False
-                            
-                            self._HitMedia( m, ctrl, shift )
-                            
-                            self._ScrollToMedia( m )
-                            
-                            break
-                            
-                        
+                    # position lookup is a dict hit, so no need to walk the whole page to find the earliest selectee
+                    m = min( self._selected_media, key = self._sorted_media.index )
+                    
+                    ctrl = False
+                    shift = False
+                    
+                    self._HitMedia( m, ctrl, shift )
+                    
+                    self._ScrollToMedia( m )
                     
                 
             
         
     
+    def _SetCachedAggregates( self, only_selected, aggregates ):
+        
+        self._aggregate_cache[ only_selected ] = ( self._GetAggregatesCacheKey( only_selected ), aggregates )
+        
+    
     def _SetCollectionsAsAlternate( self ):
         
         collections = self._GetSelectedCollections()
@@ -1427,13 +1928,23 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                     
                     media_group = collection.GetFlatMedia()
                     
-                    self._SetDuplicates( HC.DUPLICATE_ALTERNATE, media_group = media_group, silent = True )
+                    self._SetDuplicates( HC.DUPLICATE_ALTERNATE, media_group = media_group, silent = True, media_group_is_flat = True )
                     
                 
             
         
     
-    def _SetDuplicates( self, duplicate_type, media_pairs = None, media_group = None, duplicate_content_merge_options = None, silent = False ):
+    def _SetDuplicateWriteReady( self, queue_entry, pair_info ):
+        
+        queue_entry[0] = lambda: CG.client_controller.Write( 'duplicate_pair_status', pair_info )
+        
+        self._IssueDuplicateWrites()
+        
+    
+    def _SetDuplicates( self, duplicate_type, media_pairs = None, media_group = None, duplicate_content_merge_options = None, silent = False, do_it_in_thread = True, media_group_is_flat = False ):
+        
+        new_options = CG.client_controller.new_options
+        duplicate_type_string = HC.duplicate_type_string_lookup[ duplicate_type ]
         
         if duplicate_type == HC.DUPLICATE_POTENTIAL:
             
@@ -1441,30 +1952,35 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         elif duplicate_content_merge_options is None:
             
-            yes_no_text = 'apply "{}"'.format( HC.duplicate_type_string_lookup[ duplicate_type ] )
+            yes_no_text = 'apply "{}"'.format( duplicate_type_string )
             
-            if duplicate_type in [ HC.DUPLICATE_BETTER, HC.DUPLICATE_SAME_QUALITY ] or ( CG.client_controller.new_options.GetBoolean( 'advanced_mode' ) and duplicate_type == HC.DUPLICATE_ALTERNATE ):
+            if duplicate_type in [ HC.DUPLICATE_BETTER, HC.DUPLICATE_SAME_QUALITY ] or ( new_options.GetBoolean( 'advanced_mode' ) and duplicate_type == HC.DUPLICATE_ALTERNATE ):
                 
                 yes_no_text += ' (with default duplicate metadata merge options)'
                 
-                new_options = CG.client_controller.new_options
-                
                 duplicate_content_merge_options = new_options.GetDuplicateContentMergeOptions( duplicate_type )
                 
             
         else:
             
-            yes_no_text = 'apply "{}" (with custom duplicate metadata merge options)'.format( HC.duplicate_type_string_lookup[ duplicate_type ] )
+            yes_no_text = 'apply "{}" (with custom duplicate metadata merge options)'.format( duplicate_type_string )
             
         
         file_deletion_reason = 'Deleted from duplicate action on Media Page ({}).'.format( yes_no_text )
         
+        # for the every-pair types we generate the pairs as we go, not a huge list of tuples
+        every_pair = False
+        
         if media_pairs is None:
             
             if media_group is None:
                 
                 flat_media = self._GetSelectedFlatMedia()
                 
+            elif media_group_is_flat:
+                
+                flat_media = media_group
+                
             else:
                 
                 flat_media = ClientMedia.FlattenMedia( media_group )
@@ -1479,7 +1995,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             if duplicate_type in ( HC.DUPLICATE_FALSE_POSITIVE, HC.DUPLICATE_ALTERNATE, HC.DUPLICATE_POTENTIAL ):
                 
-                media_pairs = list( itertools.combinations( flat_media, 2 ) )
+                every_pair = True
+                
+                num_pairs = ( len( flat_media ) * ( len( flat_media ) - 1 ) ) // 2
                 
             else:
                 
@@ -1487,29 +2005,69 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 media_pairs = [ ( first_media, other_media ) for other_media in flat_media if other_media != first_media ]
                 
+                num_pairs = len( media_pairs )
+                
             
         else:
             
             num_files_str = HydrusNumbers.ToHumanInt( len( self._GetSelectedFlatMedia() ) )
             
+            num_pairs = len( media_pairs )
+            
         
-        if len( media_pairs ) == 0:
+        if num_pairs == 0:
             
             return False
             
         
+        # every pass below works in hashes, so fetch each media's hash once up front
+        if not every_pair:
+            
+            hashes_to_media = {}
+            hash_pairs = []
+            
+            for ( first_media, second_media ) in media_pairs:
+                
+                first_hash = first_media.GetHash()
+                second_hash = second_media.GetHash()
+                
+                hashes_to_media[ first_hash ] = first_media
+                hashes_to_media[ second_hash ] = second_media
+                
+                hash_pairs.append( ( first_hash, second_hash ) )
+                
+            
+        else:
+            
+            flat_hashes = [ media.GetHash() for media in flat_media ]
+            
+            hashes_to_media = dict( zip( flat_hashes, flat_media ) )
+            
+        
+        def iterate_hash_pairs():
+            
+            if every_pair:
+                
+                yield from itertools.combinations( flat_hashes, 2 )
+                
+            else:
+                
+                yield from hash_pairs
+                
+            
+        
         if not silent:
             
             yes_label = 'yes'
             no_label = 'no'
             
-            if len( media_pairs ) > 1 and duplicate_type in ( HC.DUPLICATE_FALSE_POSITIVE, HC.DUPLICATE_ALTERNATE ):
+            if num_pairs > 1 and duplicate_type in ( HC.DUPLICATE_FALSE_POSITIVE, HC.DUPLICATE_ALTERNATE ):
                 
-                media_pairs_str = HydrusNumbers.ToHumanInt( len( media_pairs ) )
+                media_pairs_str = HydrusNumbers.ToHumanInt( num_pairs )
                 
                 message = 'Are you sure you want to {} for the {} selected files? The relationship will be applied between every pair combination in the file selection ({} pairs).'.format( yes_no_text, num_files_str, media_pairs_str )
                 
-                if len( media_pairs ) > 100:
+                if num_pairs > 100:
                     
                     if duplicate_type == HC.DUPLICATE_FALSE_POSITIVE:
                         
@@ -1544,112 +2102,127 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             
         
-        pair_info = []
-        
-        # there's an issue here in that one decision will affect the next. if we say 'copy tags both sides' and say A > B & C, then B's tags, merged with A, should soon merge with C
-        # therefore, we need to update the media objects as we go here, which means we need duplicates to force content updates on
-        # this is a little hacky, so maybe a big rewrite here would be nice
+        # set-king is batched on a short timer, so get any we are holding on to into the db queue ahead of this
+        self._FlushPendingKings()
         
-        # There's a second issue, wew, in that in order to propagate C back to B, we need to do the whole thing twice! wow!
-        # some service_key_to_content_updates preservation gubbins is needed as a result
+        # the worker must not read the live media, which content updates change on the Qt thread, so we take our snapshot here
+        # copy-on-write is cheap, and both sides copy before they write, so what the worker sees stays still
+        hashes_to_duplicated_media = { hash : media.DuplicateCopyOnWrite() for ( hash, media ) in hashes_to_media.items() }
         
-        hashes_to_duplicated_media = {}
-        hash_pairs_to_content_update_packages = collections.defaultdict( list )
-        
-        for is_first_run in ( True, False ):
+        # the pair work touches no widgets, so after the dialogs it can go to a worker thread and not hang the client on a big alternate group
+        def work_out_pair_info():
             
-            for ( first_media, second_media ) in media_pairs:
+            # there's an issue here in that one decision will affect the next. if we say 'copy tags both sides' and say A > B & C, then B's tags, merged with A, should soon merge with C
+            # therefore, we need to update the media objects as we go here, which means we need duplicates to force content updates on
+            # this is a little hacky, so maybe a big rewrite here would be nice
+            
+            # There's a second issue, wew, in that in order to propagate C back to B, we need to revisit A > B after A > C
+            # so we do one forward pass with no deletes, and then a settle pass that only revisits pairs whose media changed after we last saw them
+            
+            hashes_to_duplicated_media_results = { hash : duplicated_media.GetMediaResult() for ( hash, duplicated_media ) in hashes_to_duplicated_media.items() }
+            hashes_to_num_changes = collections.Counter()
+            # only pairs we actually process get entries here, so an alternate group with no merge options doesn't keep a record for every pair
+            hash_pairs_to_content_update_packages = {}
+            hash_pairs_to_num_changes_when_processed = {}
+            
+            if duplicate_content_merge_options is not None:
                 
-                first_hash = first_media.GetHash()
-                second_hash = second_media.GetHash()
+                process_pair_into_content_update_package = duplicate_content_merge_options.ProcessPairIntoContentUpdatePackage
                 
-                if first_hash not in hashes_to_duplicated_media:
-                    
-                    hashes_to_duplicated_media[ first_hash ] = first_media.Duplicate()
-                    
+            
+            def process_pair( first_hash, second_hash, do_not_do_deletes ):
                 
                 first_duplicated_media = hashes_to_duplicated_media[ first_hash ]
+                second_duplicated_media = hashes_to_duplicated_media[ second_hash ]
                 
-                if second_hash not in hashes_to_duplicated_media:
-                    
-                    hashes_to_duplicated_media[ second_hash ] = second_media.Duplicate()
-                    
+                # so the important part of this mess is here. we send the duplicated media, which is keeping up with content updates, to the method here
+                # original 'first_media' is not changed, and won't be until the database Write clears and publishes everything
+                content_update_package = process_pair_into_content_update_package( first_duplicated_media, second_duplicated_media, file_deletion_reason = file_deletion_reason, do_not_do_deletes = do_not_do_deletes )
                 
-                second_duplicated_media = hashes_to_duplicated_media[ second_hash ]
+                hash_pairs_to_content_update_packages.setdefault( ( first_hash, second_hash ), [] ).append( content_update_package )
                 
-                content_update_packages = hash_pairs_to_content_update_packages[ ( first_hash, second_hash ) ]
+                ApplyDuplicatePairContentUpdatePackage( content_update_package, first_hash, second_hash, hashes_to_duplicated_media_results, hashes_to_num_changes )
                 
-                if duplicate_content_merge_options is not None:
-                    
-                    do_not_do_deletes = is_first_run
+                hash_pairs_to_num_changes_when_processed[ ( first_hash, second_hash ) ] = ( hashes_to_num_changes[ first_hash ], hashes_to_num_changes[ second_hash ] )
+                
+            
+            if duplicate_content_merge_options is not None:
+                
+                for ( first_hash, second_hash ) in iterate_hash_pairs():
                     
-                    # so the important part of this mess is here. we send the duplicated media, which is keeping up with content updates, to the method here
-                    # original 'first_media' is not changed, and won't be until the database Write clears and publishes everything
-                    content_update_packages.append( duplicate_content_merge_options.ProcessPairIntoContentUpdatePackage( first_duplicated_media, second_duplicated_media, file_deletion_reason = file_deletion_reason, do_not_do_deletes = do_not_do_deletes ) )
+                    process_pair( first_hash, second_hash, True )
                     
                 
-                for content_update_package in content_update_packages:
+                for ( first_hash, second_hash ) in iterate_hash_pairs():
                     
-                    for ( service_key, content_updates ) in content_update_package.IterateContentUpdates():
+                    if hash_pairs_to_num_changes_when_processed[ ( first_hash, second_hash ) ] != ( hashes_to_num_changes[ first_hash ], hashes_to_num_changes[ second_hash ] ):
                         
-                        for content_update in content_updates:
-                            
-                            hashes = content_update.GetHashes()
-                            
-                            if first_hash in hashes:
-                                
-                                first_duplicated_media.GetMediaResult().ProcessContentUpdate( service_key, content_update )
-                                
-                            
-                            if second_hash in hashes:
-                                
-                                second_duplicated_media.GetMediaResult().ProcessContentUpdate( service_key, content_update )
-                                
-                            
+                        process_pair( first_hash, second_hash, False )
                         
                     
                 
-                if is_first_run:
-                    
-                    continue
-                    
+            
+            pair_info = []
+            
+            for ( first_hash, second_hash ) in iterate_hash_pairs():
+                
+                content_update_packages = hash_pairs_to_content_update_packages.get( ( first_hash, second_hash ), [] )
                 
                 pair_info.append( ( duplicate_type, first_hash, second_hash, content_update_packages ) )
                 
             
+            return pair_info
+            
         
-        if len( pair_info ) > 0:
+        if do_it_in_thread:
             
-            CG.client_controller.WriteSynchronous( 'duplicate_pair_status', pair_info )
+            # we hold our place in the write queue now, and the worker hands the result back here so the write goes out on the Qt thread in turn
+            queue_entry = [ None ]
             
-            return True
+            self._duplicate_write_queue.append( queue_entry )
+            
+            def do_it():
+                
+                pair_info = work_out_pair_info()
+                
+                # the panel may be on its way out by now, but the write still has to happen, so this hangs off the main gui
+                CG.client_controller.CallAfterQtSafe( CG.client_controller.gui, 'duplicate pair status write', self._SetDuplicateWriteReady, queue_entry, pair_info )
+                
+            
+            CG.client_controller.CallToThread( do_it )
+            
+        else:
+            
+            # this is the 'set all' button on the duplicates page, which waits on us, so it can't sit behind the queue
+            CG.client_controller.WriteSynchronous( 'duplicate_pair_status', work_out_pair_info() )
             
         
-        return False
+        return True
         
     
     def _SetDuplicatesCustom( self ):
         
-        duplicate_types = [ HC.DUPLICATE_BETTER, HC.DUPLICATE_SAME_QUALITY ]
+        new_options = CG.client_controller.new_options
         
-        if CG.client_controller.new_options.GetBoolean( 'advanced_mode' ):
+        if new_options.GetBoolean( 'advanced_mode' ):
             
-            duplicate_types.append( HC.DUPLICATE_ALTERNATE )
+            choice_tuples = CUSTOM_DUPLICATE_ACTION_CHOICE_TUPLES_ADVANCED
+            
+        else:
+            
+            choice_tuples = CUSTOM_DUPLICATE_ACTION_CHOICE_TUPLES
             
         
-        choice_tuples = [ ( HC.duplicate_type_string_lookup[ duplicate_type ], duplicate_type ) for duplicate_type in duplicate_types ]
-        
+        # the select panel sorts in place, so it gets its own list
         try:
             
-            duplicate_type = ClientGUIDialogsQuick.SelectFromList( self, 'select duplicate type', choice_tuples )
+            duplicate_type = ClientGUIDialogsQuick.SelectFromList( self, 'select duplicate type', list( choice_tuples ) )
             
         except HydrusExceptions.CancelledException:
             
             return
             
         
-        new_options = CG.client_controller.new_options
-        
         duplicate_content_merge_options = new_options.GetDuplicateContentMergeOptions( duplicate_type )
         
         with ClientGUITopLevelWindowsPanels.DialogEdit( self, 'edit duplicate merge options' ) as dlg:
@@ -1676,17 +2249,31 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _SetDuplicatesFocusedBetter( self, duplicate_content_merge_options = None ):
         
-        if self._HasFocusSingleton():
-            
-            focused_singleton = self._GetFocusSingleton()
-            
-            focused_hash = focused_singleton.GetHash()
+        focused_hash = self._GetFocusedHash()
+        
+        if focused_hash is not None:
             
             flat_media = self._GetSelectedFlatMedia()
             
-            ( better_media, ) = [ media for media in flat_media if media.GetHash() == focused_hash ]
+            better_media = None
+            worse_flat_media = []
+            
+            for media in flat_media:
+                
+                if media.GetHash() == focused_hash:
+                    
+                    better_media = media
+                    
+                else:
+                    
+                    worse_flat_media.append( media )
+                    
+                
             
-            worse_flat_media = [ media for media in flat_media if media.GetHash() != focused_hash ]
+            if better_media is None:
+                
+                return
+                
             
             if len( worse_flat_media ) == 0:
                 
@@ -1723,11 +2310,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _SetDuplicatesFocusedKing( self, silent = False ):
         
-        if self._HasFocusSingleton():
-            
-            media = self._GetFocusSingleton()
-            
-            focused_hash = media.GetHash()
+        focused_hash = self._GetFocusedHash()
+        
+        if focused_hash is not None:
             
             # TODO: when media knows its duplicate gubbins, we can test num dupe files and if it is king already and stuff easier here
             
@@ -1751,7 +2336,14 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             if do_it:
                 
-                CG.client_controller.WriteSynchronous( 'duplicate_set_king', focused_hash )
+                # the last one set in a group wins, so a repeat moves to the end rather than being dropped
+                self._pending_king_hashes.pop( focused_hash, None )
+                self._pending_king_hashes[ focused_hash ] = None
+                
+                if not self._flush_pending_kings_timer.isActive():
+                    
+                    self._flush_pending_kings_timer.start()
+                    
                 
             
         else:
@@ -1766,7 +2358,7 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         media_group = self._GetSelectedFlatMedia()
         
-        self._SetDuplicates( HC.DUPLICATE_POTENTIAL, media_group = media_group )
+        self._SetDuplicates( HC.DUPLICATE_POTENTIAL, media_group = media_group, media_group_is_flat = True )
         
     
     def _SetFocusedMedia( self, media ):
@@ -1775,21 +2367,26 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             next_best_media = self._focused_media
             
-            i = self._sorted_media.index( next_best_media )
-            
-            while next_best_media in self._selected_media:
+            if next_best_media in self._selected_media:
+                
+                next_best_media = None
                 
-                if i == 0:
+                # the sorted list keeps its own item->index lookup, so this is a dict hit, and we only walk back over the selected run
+                # walking by index means we don't copy everything before the focus just to look at a few of them
+                i = self._sorted_media.index( self._focused_media )
+                
+                for j in range( i - 1, -1, -1 ):
                     
-                    next_best_media = None
+                    candidate = self._sorted_media[ j ]
                     
-                    break
+                    if candidate not in self._selected_media:
+                        
+                        next_best_media = candidate
+                        
+                        break
+                        
                     
                 
-                i -= 1
-                
-                next_best_media = self._sorted_media[ i ]
-                
             
             self._next_best_media_if_focuses_removed = next_best_media
             
@@ -1803,6 +2400,16 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         self._focused_media = media
         self._last_hit_media = media
         
+        if isinstance( media, ClientMedia.MediaSingleton ):
+            
+            self._focused_hash = media.GetHash()
+            
+        else:
+            
+            self._focused_hash = None
+            
+        
+        
         if self._focused_media is not None:
             
             publish_media = self._focused_media.GetDisplayMedia()
@@ -1859,6 +2466,8 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def _UpdateBackgroundColour( self ):
         
+        self._thumbgrid_background_colour = None
+        
         self.widget().update()
         
     
@@ -1898,8 +2507,21 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             CG.client_controller.pub( 'refresh_page_name', self._page_key )
             
+            all_aggregates = self._GetCachedAggregates( False )
+            
+            num_media_before = len( self._sorted_media )
+            
             result = ClientMedia.ListeningMediaList.AddMediaResults( self, media_results )
             
+            if all_aggregates is not None:
+                
+                # new media are appended, so we can just count the tail rather than rescanning the page
+                self._AccumulateAggregates( all_aggregates, self._sorted_media[ num_media_before : ] )
+                
+                self._SetCachedAggregates( False, all_aggregates )
+                
+            
+            
             self.newMediaAdded.emit()
             
             CG.client_controller.pub( 'notify_new_pages_count' )
@@ -1910,9 +2532,22 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
     
     def CleanBeforeDestroy( self ):
         
+        self._FlushPendingKings()
+        
+        # the panel can hang around a bit before qt deletes it, so stop it doing work for pubsubs in the meantime
+        # this covers the content/service update topics from the media list and anything a subclass added
+        self._UnsubscribeAll()
+        
         self.Clear()
         
     
+    def Clear( self ):
+        
+        self._media_to_redraw_when_shown = set()
+        
+        ClientMedia.ListeningMediaList.Clear( self )
+        
+    
     def ClearPageKey( self ):
         
         self._page_key = b'dead media panel page key'
@@ -1924,6 +2559,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         ClientMedia.ListeningMediaList.Collect( self, media_collect = media_collect )
         
+        # collecting builds new collections and drops old ones, so only keep what is still in the list
+        self._media_to_redraw_when_shown = { media for media in self._media_to_redraw_when_shown if media in self._sorted_media }
+        
         self._RecalculateVirtualSize()
         
         self.Sort()
@@ -1956,6 +2594,21 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
         
     
+    def NotifyNewOptions( self ):
+        
+        # these get checked on every click, so we keep our own copy rather than hitting the options lock each time
+        new_options = CG.client_controller.new_options
+        
+        self._focus_preview_on_ctrl_click = new_options.GetBoolean( 'focus_preview_on_ctrl_click' )
+        self._focus_preview_on_ctrl_click_only_static = new_options.GetBoolean( 'focus_preview_on_ctrl_click_only_static' )
+        self._focus_preview_on_shift_click = new_options.GetBoolean( 'focus_preview_on_shift_click' )
+        self._focus_preview_on_shift_click_only_static = new_options.GetBoolean( 'focus_preview_on_shift_click_only_static' )
+        
+        self._status_text_cache = None
+        
+        self._thumbgrid_background_colour = None
+        
+    
     def PageHidden( self ):
         
         pass
@@ -1974,7 +2627,11 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             action = command.GetSimpleAction()
             
-            if action == CAC.SIMPLE_COPY_FILE_BITMAP:
+            if action in self._simple_actions_to_callables:
+                
+                self._simple_actions_to_callables[ action ]()
+                
+            elif action == CAC.SIMPLE_COPY_FILE_BITMAP:
                 
                 if not self._HasFocusSingleton():
                     
@@ -2047,17 +2704,15 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             elif action == CAC.SIMPLE_COPY_URLS:
                 
-                ordered_selected_media = self._GetSelectedMediaOrdered()
-                
-                if len( ordered_selected_media ) > 0:
+                if len( self._selected_media ) > 0:
+                    
+                    ordered_selected_media = self._GetSelectedMediaOrdered()
                     
                     ClientGUIMediaSimpleActions.CopyMediaURLs( ordered_selected_media )
                     
                 
             elif action == CAC.SIMPLE_REARRANGE_THUMBNAILS:
                 
-                ordered_selected_media = self._GetSelectedMediaOrdered()
-                
                 ( rearrange_type, rearrange_data ) = command.GetSimpleData()
                 
                 insertion_index = None
@@ -2082,11 +2737,10 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                         
                         if len( self._selected_media ) > 0:
                             
-                            if rearrange_command in ( CAC.MOVE_LEFT, CAC.MOVE_RIGHT ):
-                                
-                                ordered_selected_media = self._GetSelectedMediaOrdered()
+                            if rearrange_command in MOVE_LEFT_OR_RIGHT:
                                 
-                                earliest_index = self._sorted_media.index( ordered_selected_media[0] )
+                                # we only need the earliest position here, so no need to sort the whole selection
+                                earliest_index = min( ( self._sorted_media.index( media ) for media in self._selected_media ) )
                                 
                                 if rearrange_command == CAC.MOVE_LEFT:
                                     
@@ -2118,232 +2772,36 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                     return
                     
                 
-                self.MoveMedia( ordered_selected_media, insertion_index = insertion_index )
-                
-            elif action == CAC.SIMPLE_SHOW_DUPLICATES:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    duplicate_type = command.GetSimpleData()
-                    
-                    ClientGUIMediaSimpleActions.ShowDuplicatesInNewPage( self._location_context, hash, duplicate_type )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_CLEAR_FOCUSED_FALSE_POSITIVES:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.ClearFalsePositives( self, ( hash, ) )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_CLEAR_FALSE_POSITIVES:
-                
-                hashes = self._GetSelectedHashes()
-                
-                if len( hashes ) > 0:
-                    
-                    ClientGUIDuplicates.ClearFalsePositives( self, hashes )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_FOCUSED_ALTERNATE_GROUP:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.DissolveAlternateGroup( self, ( hash, ) )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_ALTERNATE_GROUP:
-                
-                hashes = self._GetSelectedHashes()
-                
-                if len( hashes ) > 0:
-                    
-                    ClientGUIDuplicates.DissolveAlternateGroup( self, hashes )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_FOCUSED_DUPLICATE_GROUP:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.DissolveDuplicateGroup( self, ( hash, ) )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_DISSOLVE_DUPLICATE_GROUP:
-                
-                hashes = self._GetSelectedHashes()
-                
-                if len( hashes ) > 0:
-                    
-                    ClientGUIDuplicates.DissolveDuplicateGroup( self, hashes )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_FROM_ALTERNATE_GROUP:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.RemoveFromAlternateGroup( self, ( hash, ) )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_FROM_DUPLICATE_GROUP:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.RemoveFromDuplicateGroup( self, ( hash, ) )
-                    
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_RESET_FOCUSED_POTENTIAL_SEARCH:
-                
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
+                if len( self._selected_media ) > 0:
                     
-                    hash = media.GetHash()
+                    ordered_selected_media = self._GetSelectedMediaOrdered()
                     
-                    ClientGUIDuplicates.ResetPotentialSearch( self, ( hash, ) )
+                    self.MoveMedia( ordered_selected_media, insertion_index = insertion_index )
                     
                 
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_RESET_POTENTIAL_SEARCH:
                 
-                hashes = self._GetSelectedHashes()
-                
-                if len( hashes ) > 0:
-                    
-                    ClientGUIDuplicates.ResetPotentialSearch( self, hashes )
-                    
+            elif action == CAC.SIMPLE_SHOW_DUPLICATES:
                 
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_FOCUSED_POTENTIALS:
+                hash = self._GetFocusedHash()
                 
-                if self._HasFocusSingleton():
-                    
-                    media = self._GetFocusSingleton()
-                    
-                    hash = media.GetHash()
-                    
-                    ClientGUIDuplicates.RemovePotentials( self, ( hash, ) )
+                if hash is not None:
                     
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_REMOVE_POTENTIALS:
-                
-                hashes = self._GetSelectedHashes()
-                
-                if len( hashes ) > 0:
+                    duplicate_type = command.GetSimpleData()
                     
-                    ClientGUIDuplicates.RemovePotentials( self, hashes )
+                    ClientGUIMediaSimpleActions.ShowDuplicatesInNewPage( self._location_context, hash, duplicate_type )
                     
                 
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_ALTERNATE:
-                
-                self._SetDuplicates( HC.DUPLICATE_ALTERNATE )
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_ALTERNATE_COLLECTIONS:
-                
-                self._SetCollectionsAsAlternate()
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_CUSTOM:
-                
-                self._SetDuplicatesCustom()
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_FOCUSED_BETTER:
-                
-                self._SetDuplicatesFocusedBetter()
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_FOCUSED_KING:
-                
-                self._SetDuplicatesFocusedKing()
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_POTENTIAL:
-                
-                self._SetDuplicatesPotential()
-                
-            elif action == CAC.SIMPLE_DUPLICATE_MEDIA_SET_SAME_QUALITY:
-                
-                self._SetDuplicates( HC.DUPLICATE_SAME_QUALITY )
-                
             elif action in ( CAC.SIMPLE_EXPORT_FILES, CAC.SIMPLE_EXPORT_FILES_QUICK_AUTO_EXPORT ):
                 
                 do_export_and_then_quit = action == CAC.SIMPLE_EXPORT_FILES_QUICK_AUTO_EXPORT
                 
                 if len( self._selected_media ) > 0:
                     
-                    medias = self._GetSelectedMediaOrdered()
-                    
-                    flat_media = ClientMedia.FlattenMedia( medias )
+                    flat_media = self._GetSelectedFlatMediaOrdered()
                     
                     ClientGUIMediaModalActions.ExportFiles( self, flat_media, do_export_and_then_quit = do_export_and_then_quit )
                     
                 
-            elif action == CAC.SIMPLE_MANAGE_FILE_RATINGS:
-                
-                self._ManageRatings()
-                
-            elif action == CAC.SIMPLE_MANAGE_FILE_TAGS:
-                
-                self._ManageTags()
-                
-            elif action == CAC.SIMPLE_MANAGE_FILE_URLS:
-                
-                self._ManageURLs()
-                
-            elif action == CAC.SIMPLE_MANAGE_FILE_NOTES:
-                
-                self._ManageNotes()
-                
-            elif action == CAC.SIMPLE_MANAGE_FILE_TIMESTAMPS:
-                
-                self._ManageTimestamps()
-                
-            elif action == CAC.SIMPLE_OPEN_KNOWN_URL:
-                
-                self._OpenKnownURL()
-                
-            elif action == CAC.SIMPLE_ARCHIVE_FILE:
-                
-                self._Archive()
-                
-            elif action == CAC.SIMPLE_DELETE_FILE:
-                
-                self._Delete()
-                
-            elif action == CAC.SIMPLE_UNDELETE_FILE:
-                
-                self._Undelete()
-                
-            elif action == CAC.SIMPLE_INBOX_FILE:
-                
-                self._Inbox()
-                
-            elif action == CAC.SIMPLE_REMOVE_FILE_FROM_VIEW:
-                
-                self._Remove( ClientMediaFileFilter.FileFilter( ClientMediaFileFilter.FILE_FILTER_SELECTED ) )
-                
-            elif action == CAC.SIMPLE_LAUNCH_MEDIA_VIEWER:
-                
-                self._LaunchMediaViewer()
-                
             elif action == CAC.SIMPLE_OPEN_FILE_IN_EXTERNAL_PROGRAM:
                 
                 if self._HasFocusSingleton():
@@ -2414,10 +2872,6 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                         
                     
                 
-            elif action == CAC.SIMPLE_OPEN_SELECTION_IN_NEW_PAGE:
-                
-                self._ShowSelectionInNewPage()
-                
             elif action == CAC.SIMPLE_OPEN_SELECTION_IN_NEW_DUPLICATES_FILTER_PAGE:
                 
                 hashes = self._GetSelectedHashes( ordered = True )
@@ -2432,14 +2886,6 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 ClientGUIMediaSimpleActions.ShowSimilarFilesInNewPage( media, self._location_context, hamming_distance )
                 
-            elif action == CAC.SIMPLE_LAUNCH_THE_ARCHIVE_DELETE_FILTER:
-                
-                self._ArchiveDeleteFilter()
-                
-            elif action == CAC.SIMPLE_MAC_QUICKLOOK:
-                
-                self._MacQuicklook()
-                
             else:
                 
                 command_processed = False
@@ -2463,6 +2909,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         we_were_file_or_tag_affected = False
         
+        # a big package can hit the same thumbs many times over, so gather everything up and redraw once
+        affected_hashes = set()
+        
         for ( service_key, content_updates ) in content_update_package.IterateContentUpdates():
             
             for content_update in content_updates:
@@ -2471,11 +2920,9 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
                 if self._HasHashes( hashes ):
                     
-                    affected_media = self._GetMedia( hashes )
-                    
-                    self._RedrawMedia( affected_media )
+                    affected_hashes.update( hashes )
                     
-                    if content_update.GetDataType() in ( HC.CONTENT_TYPE_FILES, HC.CONTENT_TYPE_MAPPINGS ):
+                    if content_update.GetDataType() in FILE_OR_MAPPING_CONTENT_TYPES:
                         
                         we_were_file_or_tag_affected = True
                         
@@ -2483,6 +2930,15 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
                 
             
         
+        if len( affected_hashes ) > 0:
+            
+            self._DirtyAggregates()
+            
+            affected_media = self._GetMedia( affected_hashes )
+            
+            self._RedrawMedia( affected_media )
+            
+        
         if we_were_file_or_tag_affected:
             
             self._PublishSelectionChange( tags_changed = True )
@@ -2493,19 +2949,35 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         ClientMedia.ListeningMediaList.ProcessServiceUpdates( self, service_keys_to_service_updates )
         
+        # the dict is only read here, so iterate it directly, and do the page-wide work once however many updates came in
+        got_updates = False
+        media_may_have_changed = False
+        
         for ( service_key, service_updates ) in service_keys_to_service_updates.items():
             
             for service_update in service_updates:
                 
+                got_updates = True
+                
                 ( action, row ) = service_update.ToTuple()
                 
-                if action in ( HC.SERVICE_UPDATE_DELETE_PENDING, HC.SERVICE_UPDATE_RESET ):
+                if action in DELETE_PENDING_OR_RESET_SERVICE_UPDATES:
                     
-                    self._RecalculateVirtualSize()
+                    media_may_have_changed = True
                     
                 
-                self._PublishSelectionChange( tags_changed = True )
-                
+            
+        
+        if media_may_have_changed:
+            
+            self._DirtyAggregates()
+            
+            self._RecalculateVirtualSize()
+            
+        
+        if got_updates:
+            
+            self._PublishSelectionChange( tags_changed = True )
             
         
     
@@ -2536,7 +3008,8 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         media_group = ClientMedia.FlattenMedia( self._sorted_media )
         
-        return self._SetDuplicates( duplicate_type, media_group = media_group )
+        # the caller goes straight on to fetch new potential pairs, so this one has to have hit the db first
+        return self._SetDuplicates( duplicate_type, media_group = media_group, do_it_in_thread = False, media_group_is_flat = True )
         
     
     def SetEmptyPageStatusOverride( self, value: str ):
@@ -2598,6 +3071,8 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
         
         self._qss_colours[ CC.COLOUR_THUMBGRID_BACKGROUND ] = colour
         
+        self._thumbgrid_background_colour = None
+        
     
     def set_hmrp_thumbnail_local_background_normal( self, colour ):
         
@@ -2662,11 +3137,10 @@ class MediaPanel( CAC.ApplicationCommandProcessorMixin, ClientMedia.ListeningMed
             
             painter = QG.QPainter( self )
             
-            bg_colour = self._parent.GetColour( CC.COLOUR_THUMBGRID_BACKGROUND )
+            bg_colour = self._parent._GetThumbgridBackgroundColour()
             
-            painter.setBackground( QG.QBrush( bg_colour ) )
-            
-            painter.eraseRect( painter.viewport() )
+            # only the damaged region needs clearing
+            painter.fillRect( event.rect(), bg_colour )
             
             background_pixmap = CG.client_controller.bitmap_manager.GetMediaBackgroundPixmap()
             
@@ -2690,7 +3164,7 @@ class MediaPanelLoading( MediaPanel ):
         
         MediaPanel.__init__( self, parent, page_key, management_controller, [] )
         
-        CG.client_controller.sub( self, 'SetNumQueryResults', 'set_num_query_results' )
+        self._Subscribe( 'SetNumQueryResults', 'set_num_query_results' )
         
     
     def _GetPrettyStatusForStatusBar( self ):
@@ -2733,6 +3207,8 @@ class MediaPanelThumbnails( MediaPanel ):
         
         self._clean_canvas_pages = {}
         self._dirty_canvas_pages = []
+        self._free_canvas_pages = []
+        self._free_canvas_pages_key = None
         self._num_rows_per_canvas_page = 1
         self._num_rows_per_actual_page = 1
         
@@ -2745,15 +3221,41 @@ class MediaPanelThumbnails( MediaPanel ):
         self._hashes_to_thumbnails_waiting_to_be_drawn: typing.Dict[ bytes, ThumbnailWaitingToBeDrawn ] = {}
         self._hashes_faded = set()
         
+        # paint, resize and mouse-move all want these, so we keep them until the options change
+        self._thumbnail_span_dimensions = None
+        self._thumbnail_margin = None
+        
+        # scroll and fade do page maths constantly, so these follow the layout
+        self._canvas_page_height = None
+        self._num_thumbnails_per_canvas_page = 1
+        
+        # the base panel sets a single step of 50 until we set our own below
+        self._vertical_scroll_single_step = 50
+        self._last_virtual_size_key = None
+        self._last_virtual_size = None
+        
+        # the right-click menu wants a bunch of service/permission sets every time, and they only change when services or accounts do
+        self._service_menu_info = None
+        
+        self._pending_new_file_info_hashes = set()
+        
         super().__init__( parent, page_key, management_controller, media_results )
         
+        # an import can fire file info updates many times a second, so we gather them up and do one read
+        self._flush_pending_new_file_info_timer = QC.QTimer( self )
+        self._flush_pending_new_file_info_timer.setSingleShot( True )
+        self._flush_pending_new_file_info_timer.setInterval( 50 )
+        self._flush_pending_new_file_info_timer.timeout.connect( self._FlushPendingNewFileInfo )
+        
         self._last_device_pixel_ratio = self.devicePixelRatio()
         
         ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
         
         thumbnail_scroll_rate = float( CG.client_controller.new_options.GetString( 'thumbnail_scroll_rate' ) )
         
-        self.verticalScrollBar().setSingleStep( int( round( thumbnail_span_height * thumbnail_scroll_rate ) ) )
+        self._vertical_scroll_single_step = int( round( thumbnail_span_height * thumbnail_scroll_rate ) )
+        
+        self.verticalScrollBar().setSingleStep( self._vertical_scroll_single_step )
         
         self._widget_event_filter = QP.WidgetEventFilter( self.widget() )
         self._widget_event_filter.EVT_LEFT_DCLICK( self.EventMouseFullScreen )
@@ -2767,12 +3269,15 @@ class MediaPanelThumbnails( MediaPanel ):
         
         self._UpdateScrollBars()
         
-        CG.client_controller.sub( self, 'MaintainPageCache', 'memory_maintenance_pulse' )
-        CG.client_controller.sub( self, 'NotifyNewFileInfo', 'new_file_info' )
-        CG.client_controller.sub( self, 'NewThumbnails', 'new_thumbnails' )
-        CG.client_controller.sub( self, 'ThumbnailsReset', 'notify_complete_thumbnail_reset' )
-        CG.client_controller.sub( self, 'RedrawAllThumbnails', 'refresh_all_tag_presentation_gui' )
-        CG.client_controller.sub( self, 'WaterfallThumbnails', 'waterfall_thumbnails' )
+        self._Subscribe( 'MaintainPageCache', 'memory_maintenance_pulse' )
+        self._Subscribe( 'NotifyNewFileInfo', 'new_file_info' )
+        self._Subscribe( 'NewThumbnails', 'new_thumbnails' )
+        self._Subscribe( 'ThumbnailsReset', 'notify_complete_thumbnail_reset' )
+        self._Subscribe( 'RedrawAllThumbnails', 'refresh_all_tag_presentation_gui' )
+        self._Subscribe( 'WaterfallThumbnails', 'waterfall_thumbnails' )
+        # pubsub calls every method name subbed to a topic on every subscriber that has it, so this name has to be ours alone
+        self._Subscribe( '_InvalidateServiceMenuInfo', 'notify_new_services' )
+        self._Subscribe( '_InvalidateServiceMenuInfo', 'notify_new_permissions' )
         
     
     def _CalculateVisiblePageIndices( self ):
@@ -2783,17 +3288,13 @@ class MediaPanelThumbnails( MediaPanel ):
         
         last_y = earliest_y + QP.ScrollAreaVisibleRect( self ).size().height()
         
-        ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
-        
-        page_height = self._num_rows_per_canvas_page * thumbnail_span_height
+        page_height = self._GetCanvasPageHeight()
         
         first_visible_page_index = earliest_y // page_height
         
         last_visible_page_index = last_y // page_height
         
-        page_indices = list( range( first_visible_page_index, last_visible_page_index + 1 ) )
-        
-        return page_indices
+        return range( first_visible_page_index, last_visible_page_index + 1 )
         
     
     def _CreateNewDirtyPage( self ):
@@ -2802,31 +3303,61 @@ class MediaPanelThumbnails( MediaPanel ):
         
         ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
         
-        dpr = self.devicePixelRatio()
+        dpr = self._last_device_pixel_ratio
         
         canvas_width = int( my_width * dpr )
         canvas_height = int( self._num_rows_per_canvas_page * thumbnail_span_height * dpr )
         
-        canvas_page = CG.client_controller.bitmap_manager.GetQtImage( canvas_width, canvas_height, 32 )
+        # pages we threw away for a colour change or similar are the same big buffer we want, so reuse them rather than allocate again
+        free_canvas_pages_key = ( canvas_width, canvas_height, dpr )
+        
+        if free_canvas_pages_key != self._free_canvas_pages_key:
+            
+            self._free_canvas_pages = []
+            self._free_canvas_pages_key = free_canvas_pages_key
+            
         
-        canvas_page.setDevicePixelRatio( dpr )
+        if len( self._free_canvas_pages ) > 0:
+            
+            canvas_page = self._free_canvas_pages.pop()
+            
+        else:
+            
+            canvas_page = CG.client_controller.bitmap_manager.GetQtImage( canvas_width, canvas_height, 32 )
+            
+            canvas_page.setDevicePixelRatio( dpr )
+            
         
         self._dirty_canvas_pages.append( canvas_page )
         
     
     def _DeleteAllDirtyPages( self ):
         
+        # this is the memory maintenance path, so the free pages go too
         self._dirty_canvas_pages = []
+        self._free_canvas_pages = []
         
     
     def _DirtyAllPages( self ):
         
-        clean_indices = list( self._clean_canvas_pages.keys() )
+        # every page is going, so we can drop this page's whole waterfall in one call rather than one per page
+        self._dirty_canvas_pages.extend( self._clean_canvas_pages.values() )
         
-        for clean_index in clean_indices:
-            
-            self._DirtyPage( clean_index )
-            
+        self._clean_canvas_pages = {}
+        
+        CG.client_controller.GetCache( 'thumbnail' ).CancelWaterfallAll( self._page_key )
+        
+    
+    def _DirtyAndDiscardAllPages( self ):
+        
+        # for when the pages are going in the bin anyway, so we skip moving them to the dirty list and cancel all the waterfalls in one go
+        CG.client_controller.GetCache( 'thumbnail' ).CancelWaterfallAll( self._page_key )
+        
+        self._free_canvas_pages.extend( self._clean_canvas_pages.values() )
+        self._free_canvas_pages.extend( self._dirty_canvas_pages )
+        
+        self._clean_canvas_pages = {}
+        self._dirty_canvas_pages = []
         
     
     def _DirtyPage( self, clean_index ):
@@ -2835,7 +3366,7 @@ class MediaPanelThumbnails( MediaPanel ):
         
         del self._clean_canvas_pages[ clean_index ]
         
-        thumbnails = [ thumbnail for ( thumbnail_index, thumbnail ) in self._GetThumbnailsFromPageIndex( clean_index ) ]
+        thumbnails = self._GetThumbnailsOnlyFromPageIndex( clean_index )
         
         if len( thumbnails ) > 0:
             
@@ -2847,36 +3378,25 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def _DrawCanvasPage( self, page_index, canvas_page ):
         
-        painter = QG.QPainter( canvas_page )
-        
-        new_options = CG.client_controller.new_options
-        
-        bg_colour = self.GetColour( CC.COLOUR_THUMBGRID_BACKGROUND )
-        
-        if HG.thumbnail_debug_mode and page_index % 2 == 0:
-            
-            bg_colour = ClientGUIFunctions.GetLighterDarkerColour( bg_colour )
-            
-        
-        if new_options.GetNoneableString( 'media_background_bmp_path' ) is not None:
-            
-            comp_mode = painter.compositionMode()
-            
-            painter.setCompositionMode( QG.QPainter.CompositionMode_Source )
+        # clearing the page is a straight fill on the image, no need to set up a painter brush for it
+        if self._has_media_background_bmp:
             
-            painter.setBackground( QG.QBrush( QC.Qt.transparent ) )
+            canvas_page.fill( QC.Qt.transparent )
             
-            painter.eraseRect( painter.viewport() )
-            
-            painter.setCompositionMode( comp_mode )
+        else:
             
-        else: 
+            bg_colour = self._GetThumbgridBackgroundColour()
             
-            painter.setBackground( QG.QBrush( bg_colour ) )
+            if HG.thumbnail_debug_mode and page_index % 2 == 0:
+                
+                bg_colour = ClientGUIFunctions.GetLighterDarkerColour( bg_colour )
+                
             
-            painter.eraseRect( painter.viewport() )
+            canvas_page.fill( bg_colour )
             
         
+        painter = QG.QPainter( canvas_page )
+        
         #
         
         page_thumbnails = self._GetThumbnailsFromPageIndex( page_index )
@@ -2887,7 +3407,15 @@ class MediaPanelThumbnails( MediaPanel ):
         
         thumbnail_cache = CG.client_controller.GetCache( 'thumbnail' )
         
-        thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+        thumbnail_margin = self._GetThumbnailMargin()
+        
+        # one trip to the cache for the whole page
+        cached_hashes = thumbnail_cache.HasThumbnailsCached( ( thumbnail for ( thumbnail_index, thumbnail ) in page_thumbnails ) )
+        
+        # the page's set is the small one, so intersect from that side
+        hashes_to_draw_now = cached_hashes.intersection( self._hashes_faded )
+        
+        dpr = self._last_device_pixel_ratio
         
         for ( thumbnail_index, thumbnail ) in page_thumbnails:
             
@@ -2900,7 +3428,7 @@ class MediaPanelThumbnails( MediaPanel ):
             
             hash = display_media.GetHash()
             
-            if hash in self._hashes_faded and thumbnail_cache.HasThumbnailCached( thumbnail ):
+            if hash in hashes_to_draw_now:
                 
                 self._StopFading( hash )
                 
@@ -2912,7 +3440,7 @@ class MediaPanelThumbnails( MediaPanel ):
                 
                 y = ( thumbnail_row - ( page_index * self._num_rows_per_canvas_page ) ) * thumbnail_span_height + thumbnail_margin
                 
-                painter.drawImage( x, y, thumbnail.GetQtImage( self, self.devicePixelRatio() ) )
+                painter.drawImage( x, y, thumbnail.GetQtImage( self, dpr ) )
                 
             else:
                 
@@ -2922,7 +3450,7 @@ class MediaPanelThumbnails( MediaPanel ):
         
         if len( thumbnails_to_render_later ) > 0:
             
-            CG.client_controller.GetCache( 'thumbnail' ).Waterfall( self._page_key, thumbnails_to_render_later )
+            thumbnail_cache.Waterfall( self._page_key, thumbnails_to_render_later )
             
         
     
@@ -2940,7 +3468,11 @@ class MediaPanelThumbnails( MediaPanel ):
             return
             
         
-        now_precise = HydrusTime.GetNowPrecise()
+        # first we cheaply whittle down to what is on a clean page, then do the heavier bitmap work on just those
+        clean_page_indices = self._clean_canvas_pages.keys()
+        num_thumbnails_per_canvas_page = self._num_thumbnails_per_canvas_page
+        
+        thumbnails_to_fade = []
         
         for thumbnail in thumbnails:
             
@@ -2959,37 +3491,84 @@ class MediaPanelThumbnails( MediaPanel ):
                 
                 # probably means a collect happened during an ongoing waterfall or whatever
                 
-                continue
+                continue
+                
+            
+            if thumbnail_index // num_thumbnails_per_canvas_page not in clean_page_indices:
+                
+                continue
+                
+            
+            thumbnails_to_fade.append( ( thumbnail_index, thumbnail, display_media.GetHash() ) )
+            
+        
+        if len( thumbnails_to_fade ) > 0:
+            
+            now_precise = HydrusTime.GetNowPrecise()
+            
+            dpr = self._last_device_pixel_ratio
+            
+            fade_thumbnails = self._fade_thumbnails
+            
+            for ( thumbnail_index, thumbnail, hash ) in thumbnails_to_fade:
+                
+                self._hashes_faded.add( hash )
+                
+                self._StopFading( hash )
+                
+                bitmap = thumbnail.GetQtImage( self, dpr )
+                
+                if fade_thumbnails:
+                    
+                    thumbnail_draw_object = ThumbnailWaitingToBeDrawnAnimated( hash, thumbnail, thumbnail_index, bitmap, animation_started_precise = now_precise )
+                    
+                else:
+                    
+                    thumbnail_draw_object = ThumbnailWaitingToBeDrawn( hash, thumbnail, thumbnail_index, bitmap )
+                    
+                
+                self._hashes_to_thumbnails_waiting_to_be_drawn[ hash ] = thumbnail_draw_object
                 
             
-            if self._GetPageIndexFromThumbnailIndex( thumbnail_index ) not in self._clean_canvas_pages:
+        
+        CG.client_controller.gui.RegisterAnimationUpdateWindow( self )
+        
+    
+    def _FlushPendingNewFileInfo( self ):
+        
+        def qt_do_update( hashes_to_media_results ):
+            
+            affected_media = self._GetMedia( set( hashes_to_media_results.keys() ) )
+            
+            for media in affected_media:
                 
-                continue
+                media.UpdateFileInfo( hashes_to_media_results )
                 
             
-            hash = display_media.GetHash()
+            self._DirtyAggregates()
             
-            self._hashes_faded.add( hash )
+            self._RedrawMedia( affected_media )
             
-            self._StopFading( hash )
+        
+        def do_it( win, affected_hashes ):
             
-            bitmap = thumbnail.GetQtImage( self, self.devicePixelRatio() )
+            media_results = CG.client_controller.Read( 'media_results', affected_hashes )
             
-            fade_thumbnails = CG.client_controller.new_options.GetBoolean( 'fade_thumbnails' )
+            hashes_to_media_results = { media_result.GetHash() : media_result for media_result in media_results }
             
-            if fade_thumbnails:
-                
-                thumbnail_draw_object = ThumbnailWaitingToBeDrawnAnimated( hash, thumbnail, thumbnail_index, bitmap )
-                
-            else:
-                
-                thumbnail_draw_object = ThumbnailWaitingToBeDrawn( hash, thumbnail, thumbnail_index, bitmap )
-                
+            CG.client_controller.CallAfterQtSafe( win, 'new file info notification', qt_do_update, hashes_to_media_results )
+            
+        
+        if len( self._pending_new_file_info_hashes ) == 0:
             
-            self._hashes_to_thumbnails_waiting_to_be_drawn[ hash ] = thumbnail_draw_object
+            return
             
         
-        CG.client_controller.gui.RegisterAnimationUpdateWindow( self )
+        affected_hashes = self._pending_new_file_info_hashes
+        
+        self._pending_new_file_info_hashes = set()
+        
+        CG.client_controller.CallToThread( do_it, self, affected_hashes )
         
     
     def _GenerateMediaCollection( self, media_results ):
@@ -3002,17 +3581,28 @@ class MediaPanelThumbnails( MediaPanel ):
         return ThumbnailMediaSingleton( media_result )
         
     
+    def _GetCanvasPageHeight( self ):
+        
+        if self._canvas_page_height is None:
+            
+            ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
+            
+            self._canvas_page_height = self._num_rows_per_canvas_page * thumbnail_span_height
+            
+        
+        return self._canvas_page_height
+        
+    
     def _GetMediaCoordinates( self, media ):
         
         try: index = self._sorted_media.index( media )
         except: return ( -1, -1 )
         
-        row = index // self._num_columns
-        column = index % self._num_columns
+        ( row, column ) = divmod( index, self._num_columns )
         
         ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
         
-        thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+        thumbnail_margin = self._GetThumbnailMargin()
         
         ( x, y ) = ( column * thumbnail_span_width + thumbnail_margin, row * thumbnail_span_height + thumbnail_margin )
         
@@ -3021,19 +3611,55 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def _GetPageIndexFromThumbnailIndex( self, thumbnail_index ):
         
-        thumbnails_per_page = self._num_columns * self._num_rows_per_canvas_page
+        return thumbnail_index // self._num_thumbnails_per_canvas_page
+        
+    
+    def _GetServiceMenuInfo( self ):
+        
+        if self._service_menu_info is None:
+            
+            services = CG.client_controller.services_manager.GetServices()
+            
+            file_repositories = [ service for service in services if service.GetServiceType() == HC.FILE_REPOSITORY ]
+            
+            i_can_post_ratings = any( service.GetServiceType() in HC.RATINGS_SERVICES for service in services )
+            
+            local_media_file_service_keys = { service.GetServiceKey() for service in services if service.GetServiceType() == HC.LOCAL_FILE_DOMAIN }
+            
+            file_repository_service_keys = { repository.GetServiceKey() for repository in file_repositories }
+            upload_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_CREATE ) }
+            petition_resolve_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_MODERATE ) }
+            petition_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_PETITION ) } - petition_resolve_permission_file_service_keys
+            user_manage_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_ACCOUNTS, HC.PERMISSION_ACTION_MODERATE ) }
+            ipfs_service_keys = { service.GetServiceKey() for service in services if service.GetServiceType() == HC.IPFS }
+            
+            self._service_menu_info = ( i_can_post_ratings, local_media_file_service_keys, file_repository_service_keys, upload_permission_file_service_keys, petition_resolve_permission_file_service_keys, petition_permission_file_service_keys, user_manage_permission_file_service_keys, ipfs_service_keys )
+            
+        
+        return self._service_menu_info
+        
+    
+    def _GetThumbnailMargin( self ):
         
-        page_index = thumbnail_index // thumbnails_per_page
+        if self._thumbnail_margin is None:
+            
+            self._thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+            
         
-        return page_index
+        return self._thumbnail_margin
         
     
     def _GetThumbnailSpanDimensions( self ):
         
-        thumbnail_border = CG.client_controller.new_options.GetInteger( 'thumbnail_border' )
-        thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+        if self._thumbnail_span_dimensions is None:
+            
+            thumbnail_border = CG.client_controller.new_options.GetInteger( 'thumbnail_border' )
+            thumbnail_margin = self._GetThumbnailMargin()
+            
+            self._thumbnail_span_dimensions = ClientData.AddPaddingToDimensions( HC.options[ 'thumbnail_dimensions' ], ( thumbnail_border + thumbnail_margin ) * 2 )
+            
         
-        return ClientData.AddPaddingToDimensions( HC.options[ 'thumbnail_dimensions' ], ( thumbnail_border + thumbnail_margin ) * 2 )
+        return self._thumbnail_span_dimensions
         
     
     def _GetThumbnailUnderMouse( self, mouse_event ):
@@ -3045,19 +3671,17 @@ class MediaPanelThumbnails( MediaPanel ):
         
         ( t_span_x, t_span_y ) = self._GetThumbnailSpanDimensions()
         
-        x_mod = x % t_span_x
-        y_mod = y % t_span_y
+        # divmod gets us the cell and the offset within it in one go
+        ( column_index, x_mod ) = divmod( x, t_span_x )
+        ( row_index, y_mod ) = divmod( y, t_span_y )
         
-        thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+        thumbnail_margin = self._GetThumbnailMargin()
         
         if x_mod <= thumbnail_margin or y_mod <= thumbnail_margin or x_mod > t_span_x - thumbnail_margin or y_mod > t_span_y - thumbnail_margin:
             
             return None
             
         
-        column_index = x // t_span_x
-        row_index = y // t_span_y
-        
         if column_index >= self._num_columns:
             
             return None
@@ -3078,26 +3702,47 @@ class MediaPanelThumbnails( MediaPanel ):
         return self._sorted_media[ thumbnail_index ]
         
     
-    def _GetThumbnailsFromPageIndex( self, page_index ):
+    def _GetThumbnailIndexRangeFromPageIndex( self, page_index ):
         
         num_thumbnails_per_page = self._num_columns * self._num_rows_per_canvas_page
         
         start_index = num_thumbnails_per_page * page_index
         
-        if start_index <= len( self._sorted_media ):
-            
-            end_index = min( len( self._sorted_media ), start_index + num_thumbnails_per_page )
+        end_index = min( len( self._sorted_media ), start_index + num_thumbnails_per_page )
+        
+        return ( start_index, end_index )
+        
+    
+    def _GetThumbnailsFromPageIndex( self, page_index ):
+        
+        ( start_index, end_index ) = self._GetThumbnailIndexRangeFromPageIndex( page_index )
+        
+        if start_index < end_index:
             
-            thumbnails = [ ( index, self._sorted_media[ index ] ) for index in range( start_index, end_index ) ]
+            # slicing is a C copy, much quicker than indexing each one in python
+            return list( enumerate( self._sorted_media[ start_index : end_index ], start_index ) )
             
         else:
             
-            thumbnails = []
+            return []
             
         
-        return thumbnails
+    
+    def _GetThumbnailsOnlyFromPageIndex( self, page_index ):
+        
+        ( start_index, end_index ) = self._GetThumbnailIndexRangeFromPageIndex( page_index )
+        
+        if start_index < end_index:
+            
+            return self._sorted_media[ start_index : end_index ]
+            
+        else:
+            
+            return []
+            
         
     
+    
     def _GetYStart( self ):
         
         visible_rect = QP.ScrollAreaVisibleRect( self )
@@ -3119,6 +3764,11 @@ class MediaPanelThumbnails( MediaPanel ):
         return y_start
         
     
+    def _InvalidateServiceMenuInfo( self ):
+        
+        self._service_menu_info = None
+        
+    
     def _MediaIsInCleanPage( self, thumbnail ):
         
         try:
@@ -3130,14 +3780,8 @@ class MediaPanelThumbnails( MediaPanel ):
             return False
             
         
-        if self._GetPageIndexFromThumbnailIndex( index ) in self._clean_canvas_pages:
-            
-            return True
-            
-        else:
-            
-            return False
-            
+        return index // self._num_thumbnails_per_canvas_page in self._clean_canvas_pages
+        
         
     
     def _MediaIsVisible( self, media ):
@@ -3241,6 +3885,19 @@ class MediaPanelThumbnails( MediaPanel ):
             
             num_media = len( self._sorted_media )
             
+            yUnit = self._vertical_scroll_single_step
+            
+            virtual_size_key = ( num_media, self._num_columns, thumbnail_span_height, my_width, my_height, yUnit )
+            
+            # adding a file or a small resize usually lands on the same size, so don't redo the maths. the widget can still drift, so we always check that
+            if virtual_size_key == self._last_virtual_size_key:
+                
+                if self._last_virtual_size == self.widget().size():
+                    
+                    return
+                    
+                
+            
             num_rows = max( 1, num_media // self._num_columns )
             
             if num_media % self._num_columns > 0:
@@ -3252,8 +3909,6 @@ class MediaPanelThumbnails( MediaPanel ):
             
             virtual_height = num_rows * thumbnail_span_height
             
-            yUnit = self.verticalScrollBar().singleStep()
-            
             excess = virtual_height % yUnit
             
             if excess > 0: # we want virtual height to fit exactly into scroll units, even if that puts some padding below bottom row
@@ -3267,6 +3922,9 @@ class MediaPanelThumbnails( MediaPanel ):
             
             virtual_size = QC.QSize( virtual_width, virtual_height )
             
+            self._last_virtual_size_key = virtual_size_key
+            self._last_virtual_size = virtual_size
+            
             if virtual_size != self.widget().size():
                 
                 self.widget().resize( QC.QSize( virtual_width, virtual_height ) )
@@ -3281,7 +3939,34 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def _RedrawMedia( self, thumbnails ):
         
-        visible_thumbnails = [ thumbnail for thumbnail in thumbnails if self._MediaIsInCleanPage( thumbnail ) ]
+        # a coalesced update can hand us the same thumb more than once, and the index lookups are dict hits, so this stays O(n)
+        # this is _MediaIsInCleanPage inlined, since it can be a big batch
+        clean_page_indices = self._clean_canvas_pages.keys()
+        num_thumbnails_per_canvas_page = self._num_thumbnails_per_canvas_page
+        
+        visible_thumbnails = []
+        
+        for thumbnail in set( thumbnails ):
+            
+            try:
+                
+                index = self._sorted_media.index( thumbnail )
+                
+            except HydrusExceptions.DataMissing:
+                
+                continue
+                
+            
+            if index // num_thumbnails_per_canvas_page in clean_page_indices:
+                
+                visible_thumbnails.append( thumbnail )
+                
+            
+        
+        if len( visible_thumbnails ) == 0:
+            
+            return
+            
         
         thumbnail_cache = CG.client_controller.GetCache( 'thumbnail' )
         
@@ -3307,7 +3992,7 @@ class MediaPanelThumbnails( MediaPanel ):
         
         if len( thumbnails_to_render_later ) > 0:
             
-            CG.client_controller.GetCache( 'thumbnail' ).Waterfall( self._page_key, thumbnails_to_render_later )
+            thumbnail_cache.Waterfall( self._page_key, thumbnails_to_render_later )
             
         
     
@@ -3333,6 +4018,9 @@ class MediaPanelThumbnails( MediaPanel ):
         
         self._num_columns = max( 1, my_width // thumbnail_span_width )
         
+        self._canvas_page_height = self._num_rows_per_canvas_page * thumbnail_span_height
+        self._num_thumbnails_per_canvas_page = self._num_columns * self._num_rows_per_canvas_page
+        
         dimensions_changed = old_width != my_width or old_height != my_height
         thumb_layout_changed = old_num_columns != self._num_columns or old_num_rows != self._num_rows_per_canvas_page
         
@@ -3342,9 +4030,7 @@ class MediaPanelThumbnails( MediaPanel ):
             
             if thumb_layout_changed or width_got_bigger:
                 
-                self._DirtyAllPages()
-                
-                self._DeleteAllDirtyPages()
+                self._DirtyAndDiscardAllPages()
                 
             
             self.widget().update()
@@ -3416,9 +4102,7 @@ class MediaPanelThumbnails( MediaPanel ):
             
             ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
             
-            new_options = CG.client_controller.new_options
-            
-            percent_visible = new_options.GetInteger( 'thumbnail_visibility_scroll_percent' ) / 100
+            percent_visible = self._thumbnail_visibility_scroll_percent / 100
             
             if y < visible_rect_y:
                 
@@ -3441,13 +4125,10 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def _UpdateBackgroundColour( self ):
         
-        MediaPanel._UpdateBackgroundColour( self )
-        
-        self._DirtyAllPages()
-        
-        self._DeleteAllDirtyPages()
+        # the base call does the widget update, and qt only paints once per tick however many updates we ask for
+        self._DirtyAndDiscardAllPages()
         
-        self.widget().update()
+        MediaPanel._UpdateBackgroundColour( self )
         
     
     def _UpdateScrollBars( self ):
@@ -3480,7 +4161,7 @@ class MediaPanelThumbnails( MediaPanel ):
                     
                 else:
                     
-                    self.statusTextChanged.emit( self._GetPrettyStatusForStatusBar() )
+                    self._PublishStatusText()
                     
                 
             
@@ -3494,6 +4175,22 @@ class MediaPanelThumbnails( MediaPanel ):
             
         
     
+    def CleanBeforeDestroy( self ):
+        
+        self._flush_pending_new_file_info_timer.stop()
+        
+        self._pending_new_file_info_hashes = set()
+        
+        self._hashes_to_thumbnails_waiting_to_be_drawn = {}
+        self._hashes_faded = set()
+        
+        self._clean_canvas_pages = {}
+        self._dirty_canvas_pages = []
+        self._free_canvas_pages = []
+        
+        super().CleanBeforeDestroy()
+        
+    
     def EventMouseFullScreen( self, event ):
         
         t = self._GetThumbnailUnderMouse( event )
@@ -3536,11 +4233,14 @@ class MediaPanelThumbnails( MediaPanel ):
         
         if not CG.client_controller.gui.IsCurrentPage( self._page_key ):
             
-            self._DirtyAllPages()
+            self._DirtyAndDiscardAllPages()
             
         
         self._DeleteAllDirtyPages()
         
+        # we remember every hash we ever faded in, so drop the ones that have since left the page
+        self._hashes_faded.intersection_update( self._hashes )
+        
     
     def mouseMoveEvent( self, event ):
         
@@ -3631,30 +4331,28 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def NotifyNewFileInfo( self, hashes ):
         
-        def qt_do_update( hashes_to_media_results ):
-            
-            affected_media = self._GetMedia( set( hashes_to_media_results.keys() ) )
-            
-            for media in affected_media:
-                
-                media.UpdateFileInfo( hashes_to_media_results )
-                
-            
-            self._RedrawMedia( affected_media )
-            
+        self._pending_new_file_info_hashes.update( self._hashes.intersection( hashes ) )
         
-        def do_it( win, callable, affected_hashes ):
+        if len( self._pending_new_file_info_hashes ) > 0 and not self._flush_pending_new_file_info_timer.isActive():
             
-            media_results = CG.client_controller.Read( 'media_results', affected_hashes )
-            
-            hashes_to_media_results = { media_result.GetHash() : media_result for media_result in media_results }
-            
-            CG.client_controller.CallAfterQtSafe( win, 'new file info notification', qt_do_update, hashes_to_media_results )
+            self._flush_pending_new_file_info_timer.start()
             
         
-        affected_hashes = self._hashes.intersection( hashes )
+    
+    def NotifyNewOptions( self ):
+        
+        self._thumbnail_span_dimensions = None
+        self._thumbnail_margin = None
+        self._canvas_page_height = None
+        
+        # paint, fade and scroll all check these, so we keep our own copy like the click options
+        new_options = CG.client_controller.new_options
+        
+        self._has_media_background_bmp = new_options.GetNoneableString( 'media_background_bmp_path' ) is not None
+        self._fade_thumbnails = new_options.GetBoolean( 'fade_thumbnails' )
+        self._thumbnail_visibility_scroll_percent = new_options.GetInteger( 'thumbnail_visibility_scroll_percent' )
         
-        CG.client_controller.CallToThread( do_it, self, do_it, affected_hashes )
+        super().NotifyNewOptions()
         
     
     def ProcessApplicationCommand( self, command: CAC.ApplicationCommand ):
@@ -3671,7 +4369,7 @@ class MediaPanelThumbnails( MediaPanel ):
                 
                 shift = selection_status == CAC.SELECTION_STATUS_SHIFT
                 
-                if move_direction in ( CAC.MOVE_HOME, CAC.MOVE_END ):
+                if move_direction in MOVE_HOME_OR_END:
                     
                     if move_direction == CAC.MOVE_HOME:
                         
@@ -3682,7 +4380,7 @@ class MediaPanelThumbnails( MediaPanel ):
                         self._ScrollEnd( shift )
                         
                     
-                elif move_direction in ( CAC.MOVE_PAGE_UP, CAC.MOVE_PAGE_DOWN ):
+                elif move_direction in MOVE_PAGE_UP_OR_DOWN:
                     
                     if move_direction == CAC.MOVE_PAGE_UP:
                         
@@ -3753,6 +4451,9 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def RedrawAllThumbnails( self ):
         
+        # tag display may have changed under us, which tag filters care about
+        self._DirtyAggregates()
+        
         self._DirtyAllPages()
         
         for m in self._collected_media:
@@ -3797,6 +4498,8 @@ class MediaPanelThumbnails( MediaPanel ):
         
         self._UpdateScrollBars()
         
+        self._RedrawPendingMedia()
+        
     
     def ShowMenu( self, do_not_show_just_return = False ):
         
@@ -3805,24 +4508,64 @@ class MediaPanelThumbnails( MediaPanel ):
         all_locations_managers = [ media.GetLocationsManager() for media in ClientMedia.FlattenMedia( self._sorted_media ) ]
         selected_locations_managers = [ media.GetLocationsManager() for media in flat_selected_medias ]
         
-        selection_has_local_file_domain = True in ( locations_manager.IsLocal() and not locations_manager.IsTrashed() for locations_manager in selected_locations_managers )
-        selection_has_trash = True in ( locations_manager.IsTrashed() for locations_manager in selected_locations_managers )
-        selection_has_inbox = True in ( media.HasInbox() for media in self._selected_media )
-        selection_has_archive = True in ( media.HasArchive() and media.GetLocationsManager().IsLocal() for media in self._selected_media )
-        selection_has_deletion_record = True in ( CC.COMBINED_LOCAL_FILE_SERVICE_KEY in locations_manager.GetDeleted() for locations_manager in selected_locations_managers )
+        selection_has_local_file_domain = any( locations_manager.IsLocal() and not locations_manager.IsTrashed() for locations_manager in selected_locations_managers )
+        selection_has_trash = any( locations_manager.IsTrashed() for locations_manager in selected_locations_managers )
+        selection_has_deletion_record = any( CC.COMBINED_LOCAL_FILE_SERVICE_KEY in locations_manager.GetDeleted() for locations_manager in selected_locations_managers )
+        
+        selection_has_inbox = False
+        selection_has_archive = False
+        
+        for media in self._selected_media:
+            
+            if not selection_has_inbox and media.HasInbox():
+                
+                selection_has_inbox = True
+                
+            
+            if not selection_has_archive and media.HasArchive() and media.GetLocationsManager().IsLocal():
+                
+                selection_has_archive = True
+                
+            
+            if selection_has_inbox and selection_has_archive:
+                
+                break
+                
+            
         
         all_file_domains = HydrusLists.MassUnion( locations_manager.GetCurrent() for locations_manager in all_locations_managers )
         all_specific_file_domains = all_file_domains.difference( { CC.COMBINED_FILE_SERVICE_KEY, CC.COMBINED_LOCAL_FILE_SERVICE_KEY } )
         
-        some_downloading = True in ( locations_manager.IsDownloading() for locations_manager in selected_locations_managers )
+        some_downloading = any( locations_manager.IsDownloading() for locations_manager in selected_locations_managers )
+        
+        has_local = False
+        has_remote = False
+        
+        for locations_manager in all_locations_managers:
+            
+            if not has_local and locations_manager.IsLocal():
+                
+                has_local = True
+                
+            
+            if not has_remote and locations_manager.IsRemote():
+                
+                has_remote = True
+                
+            
+            if has_local and has_remote:
+                
+                break
+                
+            
         
-        has_local = True in ( locations_manager.IsLocal() for locations_manager in all_locations_managers )
-        has_remote = True in ( locations_manager.IsRemote() for locations_manager in all_locations_managers )
+        # the page aggregates already hold these and stay cached until the media changes, so no need to walk everything again
+        aggregates = self._GetAggregates()
         
-        num_files = self.GetNumFiles()
+        num_files = aggregates[ 'num_files' ]
         num_selected = self._GetNumSelected()
-        num_inbox = self.GetNumInbox()
-        num_archive = self.GetNumArchive()
+        num_inbox = aggregates[ 'num_inbox' ]
+        num_archive = num_files - num_inbox
         
         multiple_selected = num_selected > 1
         
@@ -3834,30 +4577,9 @@ class MediaPanelThumbnails( MediaPanel ):
             
             # variables
             
-            collections_selected = True in ( media.IsCollection() for media in self._selected_media )
-            
-            services_manager = CG.client_controller.services_manager
-            
-            services = services_manager.GetServices()
-            
-            service_keys_to_names = { service.GetServiceKey() : service.GetName() for service in services }
-            
-            file_repositories = [ service for service in services if service.GetServiceType() == HC.FILE_REPOSITORY ]
-            
-            ipfs_services = [ service for service in services if service.GetServiceType() == HC.IPFS ]
-            
-            local_ratings_services = [ service for service in services if service.GetServiceType() in HC.RATINGS_SERVICES ]
-            
-            i_can_post_ratings = len( local_ratings_services ) > 0
-            
-            local_media_file_service_keys = { service.GetServiceKey() for service in services if service.GetServiceType() == HC.LOCAL_FILE_DOMAIN }
+            collections_selected = any( media.IsCollection() for media in self._selected_media )
             
-            file_repository_service_keys = { repository.GetServiceKey() for repository in file_repositories }
-            upload_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_CREATE ) }
-            petition_resolve_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_MODERATE ) }
-            petition_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_FILES, HC.PERMISSION_ACTION_PETITION ) } - petition_resolve_permission_file_service_keys
-            user_manage_permission_file_service_keys = { repository.GetServiceKey() for repository in file_repositories if repository.HasPermission( HC.CONTENT_TYPE_ACCOUNTS, HC.PERMISSION_ACTION_MODERATE ) }
-            ipfs_service_keys = { service.GetServiceKey() for service in ipfs_services }
+            ( i_can_post_ratings, local_media_file_service_keys, file_repository_service_keys, upload_permission_file_service_keys, petition_resolve_permission_file_service_keys, petition_permission_file_service_keys, user_manage_permission_file_service_keys, ipfs_service_keys ) = self._GetServiceMenuInfo()
             
             if multiple_selected:
                 
@@ -3910,20 +4632,52 @@ class MediaPanelThumbnails( MediaPanel ):
             
             remote_service_keys = CG.client_controller.services_manager.GetRemoteFileServiceKeys()
             
-            groups_of_current_remote_service_keys = [ locations_manager.GetCurrent().intersection( remote_service_keys ) for locations_manager in selected_locations_managers ]
-            groups_of_pending_remote_service_keys = [ locations_manager.GetPending().intersection( remote_service_keys ) for locations_manager in selected_locations_managers ]
-            groups_of_petitioned_remote_service_keys = [ locations_manager.GetPetitioned().intersection( remote_service_keys ) for locations_manager in selected_locations_managers ]
-            groups_of_deleted_remote_service_keys = [ locations_manager.GetDeleted().intersection( remote_service_keys ) for locations_manager in selected_locations_managers ]
+            current_remote_service_keys = set()
+            pending_remote_service_keys = set()
+            petitioned_remote_service_keys = set()
+            deleted_remote_service_keys = set()
+            
+            common_current_remote_service_keys = None
+            common_pending_remote_service_keys = None
+            common_petitioned_remote_service_keys = None
+            common_deleted_remote_service_keys = None
             
-            current_remote_service_keys = HydrusLists.MassUnion( groups_of_current_remote_service_keys )
-            pending_remote_service_keys = HydrusLists.MassUnion( groups_of_pending_remote_service_keys )
-            petitioned_remote_service_keys = HydrusLists.MassUnion( groups_of_petitioned_remote_service_keys )
-            deleted_remote_service_keys = HydrusLists.MassUnion( groups_of_deleted_remote_service_keys )
+            # one pass over the selection for all four unions and intersections
+            for locations_manager in selected_locations_managers:
+                
+                current = locations_manager.GetCurrent().intersection( remote_service_keys )
+                pending = locations_manager.GetPending().intersection( remote_service_keys )
+                petitioned = locations_manager.GetPetitioned().intersection( remote_service_keys )
+                deleted = locations_manager.GetDeleted().intersection( remote_service_keys )
+                
+                current_remote_service_keys.update( current )
+                pending_remote_service_keys.update( pending )
+                petitioned_remote_service_keys.update( petitioned )
+                deleted_remote_service_keys.update( deleted )
+                
+                if common_current_remote_service_keys is None:
+                    
+                    common_current_remote_service_keys = current
+                    common_pending_remote_service_keys = pending
+                    common_petitioned_remote_service_keys = petitioned
+                    common_deleted_remote_service_keys = deleted
+                    
+                else:
+                    
+                    common_current_remote_service_keys.intersection_update( current )
+                    common_pending_remote_service_keys.intersection_update( pending )
+                    common_petitioned_remote_service_keys.intersection_update( petitioned )
+                    common_deleted_remote_service_keys.intersection_update( deleted )
+                    
+                
             
-            common_current_remote_service_keys = HydrusLists.IntelligentMassIntersect( groups_of_current_remote_service_keys )
-            common_pending_remote_service_keys = HydrusLists.IntelligentMassIntersect( groups_of_pending_remote_service_keys )
-            common_petitioned_remote_service_keys = HydrusLists.IntelligentMassIntersect( groups_of_petitioned_remote_service_keys )
-            common_deleted_remote_service_keys = HydrusLists.IntelligentMassIntersect( groups_of_deleted_remote_service_keys )
+            if common_current_remote_service_keys is None:
+                
+                common_current_remote_service_keys = set()
+                common_pending_remote_service_keys = set()
+                common_petitioned_remote_service_keys = set()
+                common_deleted_remote_service_keys = set()
+                
             
             disparate_current_remote_service_keys = current_remote_service_keys - common_current_remote_service_keys
             disparate_pending_remote_service_keys = pending_remote_service_keys - common_pending_remote_service_keys
@@ -4035,7 +4789,7 @@ class MediaPanelThumbnails( MediaPanel ):
             
             selection_info_menu = ClientGUIMenus.GenerateMenu( menu )
             
-            selected_files_string = ClientMedia.GetMediasFiletypeSummaryString( self._selected_media )
+            selected_files_string = self._GetAggregatesFiletypeSummary( self._GetAggregates( only_selected = True ) )
             
             selection_info_menu_label = f'{selected_files_string}, {self._GetPrettyTotalSize( only_selected = True )}'
             
@@ -4165,15 +4919,13 @@ class MediaPanelThumbnails( MediaPanel ):
             
             if len( self._selected_media ) > 0:
                 
-                ordered_selected_media = self._GetSelectedMediaOrdered()
-                
                 try:
                     
-                    earliest_index = self._sorted_media.index( ordered_selected_media[0] )
+                    ( earliest_index, latest_index ) = self._GetSelectedMediaIndexRange()
                     
                     num_selected = len( self._selected_media )
                     
-                    selection_is_contiguous = num_selected > 0 and self._sorted_media.index( ordered_selected_media[-1] ) - earliest_index == num_selected - 1
+                    selection_is_contiguous = num_selected > 0 and latest_index - earliest_index == num_selected - 1
                     
                     AddMoveMenu( self, menu, self._selected_media, self._sorted_media, self._focused_media, selection_is_contiguous, earliest_index )
                     
@@ -4422,11 +5174,17 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def ThumbnailsReset( self ):
         
+        self._thumbnail_span_dimensions = None
+        self._thumbnail_margin = None
+        self._canvas_page_height = None
+        
         ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
         
         thumbnail_scroll_rate = float( CG.client_controller.new_options.GetString( 'thumbnail_scroll_rate' ) )
         
-        self.verticalScrollBar().setSingleStep( int( round( thumbnail_span_height * thumbnail_scroll_rate ) ) )
+        self._vertical_scroll_single_step = int( round( thumbnail_span_height * thumbnail_scroll_rate ) )
+        
+        self.verticalScrollBar().setSingleStep( self._vertical_scroll_single_step )
         
         self._hashes_to_thumbnails_waiting_to_be_drawn = {}
         self._hashes_faded = set()
@@ -4440,11 +5198,14 @@ class MediaPanelThumbnails( MediaPanel ):
     
     def TIMERAnimationUpdate( self ):
         
-        loop_should_break_time = HydrusTime.GetNowPrecise() + ( FRAME_DURATION_60FPS / 2 )
+        # one clock read for the whole tick, shared by every fade in flight
+        now_precise = HydrusTime.GetNowPrecise()
+        
+        loop_should_break_time = now_precise + ( FRAME_DURATION_60FPS / 2 )
         
         ( thumbnail_span_width, thumbnail_span_height ) = self._GetThumbnailSpanDimensions()
         
-        thumbnail_margin = CG.client_controller.new_options.GetInteger( 'thumbnail_margin' )
+        thumbnail_margin = self._GetThumbnailMargin()
         
         hashes = list( self._hashes_to_thumbnails_waiting_to_be_drawn.keys() )
         
@@ -4458,7 +5219,7 @@ class MediaPanelThumbnails( MediaPanel ):
             
             delete_entry = False
             
-            if thumbnail_draw_object.DrawDue():
+            if thumbnail_draw_object.DrawDue( now_precise ):
                 
                 thumbnail_index = thumbnail_draw_object.thumbnail_index
                 
@@ -4502,7 +5263,7 @@ class MediaPanelThumbnails( MediaPanel ):
                     
                     painter = page_indices_to_painters[ page_index ]
                     
-                    thumbnail_draw_object.DrawToPainter( x, y, painter )
+                    thumbnail_draw_object.DrawToPainter( x, y, painter, now_precise )
                     
                     #
                     
@@ -4566,24 +5327,27 @@ class MediaPanelThumbnails( MediaPanel ):
         
         def paintEvent( self, event ):
             
-            if self._parent.devicePixelRatio() != self._parent._last_device_pixel_ratio:
+            # this is the one place we ask qt for the dpr. everything else reads our copy, which a screen change updates here before any page is drawn
+            device_pixel_ratio = self._parent.devicePixelRatio()
+            
+            if device_pixel_ratio != self._parent._last_device_pixel_ratio:
                 
-                self._parent._last_device_pixel_ratio = self._parent.devicePixelRatio()
+                self._parent._last_device_pixel_ratio = device_pixel_ratio
                 
-                self._parent._DirtyAllPages()
-                self._parent._DeleteAllDirtyPages()
+                self._parent._DirtyAndDiscardAllPages()
                 
             
             painter = QG.QPainter( self )
             
             ( thumbnail_span_width, thumbnail_span_height ) = self._parent._GetThumbnailSpanDimensions()
             
-            page_height = self._parent._num_rows_per_canvas_page * thumbnail_span_height
+            page_height = self._parent._GetCanvasPageHeight()
             
             page_indices_to_display = self._parent._CalculateVisiblePageIndices()
             
-            earliest_page_index_to_display = min( page_indices_to_display )
-            last_page_index_to_display = max( page_indices_to_display )
+            # this is a range, so the ends are just its ends
+            earliest_page_index_to_display = page_indices_to_display[0]
+            last_page_index_to_display = page_indices_to_display[-1]
             
             page_indices_to_draw = list( page_indices_to_display )
             
@@ -4602,13 +5366,20 @@ class MediaPanelThumbnails( MediaPanel ):
             
             y_start = self._parent._GetYStart()
             
-            bg_colour = self._parent.GetColour( CC.COLOUR_THUMBGRID_BACKGROUND )
+            bg_colour = self._parent._GetThumbgridBackgroundColour()
             
-            painter.setBackground( QG.QBrush( bg_colour ) )
+            # only the damaged region needs clearing
+            painter.fillRect( event.rect(), bg_colour )
             
-            painter.eraseRect( painter.viewport() )
-            
-            background_pixmap = CG.client_controller.bitmap_manager.GetMediaBackgroundPixmap()
+            # no need to ask the bitmap manager for a pixmap when we know there isn't one
+            if self._parent._has_media_background_bmp:
+                
+                background_pixmap = CG.client_controller.bitmap_manager.GetMediaBackgroundPixmap()
+                
+            else:
+                
+                background_pixmap = None
+                
             
             if background_pixmap is not None:
                 
@@ -4898,6 +5669,37 @@ def AddSelectMenu( win: MediaPanel, menu, filter_counts, all_specific_file_domai
         ClientGUIMenus.AppendMenu( menu, select_menu, 'select' )
         
     
+def ApplyDuplicatePairContentUpdatePackage( content_update_package: ClientContentUpdates.ContentUpdatePackage, first_hash: bytes, second_hash: bytes, hashes_to_duplicated_media_results, hashes_to_num_changes: collections.Counter ):
+    
+    # this is the hot part of the duplicate pair loop, so it lives out here away from the panel
+    # the duplicated media have seen every earlier package, so only this new one needs applying
+    
+    first_duplicated_media_result = hashes_to_duplicated_media_results[ first_hash ]
+    second_duplicated_media_result = hashes_to_duplicated_media_results[ second_hash ]
+    
+    for ( service_key, content_updates ) in content_update_package.IterateContentUpdates():
+        
+        for content_update in content_updates:
+            
+            hashes = content_update.GetHashes()
+            
+            if first_hash in hashes:
+                
+                first_duplicated_media_result.ProcessContentUpdate( service_key, content_update )
+                
+                hashes_to_num_changes[ first_hash ] += 1
+                
+            
+            if second_hash in hashes:
+                
+                second_duplicated_media_result.ProcessContentUpdate( service_key, content_update )
+                
+                hashes_to_num_changes[ second_hash ] += 1
+                
+            
+        
+    
+
 class Selectable( object ):
     
     def __init__( self, *args, **kwargs ):
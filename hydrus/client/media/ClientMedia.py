@@ -117,81 +117,92 @@ def GetMediaResultsTagCount( media_results, tag_service_key, tag_display_type ):
     return GetTagsManagersTagCount( tags_managers, tag_service_key, tag_display_type )
     
 
-def GetMediasFiletypeSummaryString( medias: typing.Collection[ "Media" ] ):
+def GetFiletypeSummaryString( num_medias: int, num_files: int, mimes: typing.Collection[ int ], num_collections: int ):
     
-        def GetDescriptor( plural, classes, num_collections ):
+    def GetDescriptor( plural, classes, num_collections ):
+        
+        suffix = 's' if plural else ''
+        
+        if len( classes ) == 0:
             
-            suffix = 's' if plural else ''
+            return 'file' + suffix
             
-            if len( classes ) == 0:
-                
-                return 'file' + suffix
-                
+        
+        if len( classes ) == 1:
             
-            if len( classes ) == 1:
-                
-                ( mime, ) = classes
-                
-                if mime == HC.APPLICATION_HYDRUS_CLIENT_COLLECTION:
-                    
-                    collections_suffix = 's' if num_collections > 1 else ''
-                    
-                    return 'file{} in {} collection{}'.format( suffix, HydrusNumbers.ToHumanInt( num_collections ), collections_suffix )
-                    
-                else:
-                    
-                    return HC.mime_string_lookup[ mime ] + suffix
-                    
-                
+            ( mime, ) = classes
             
-            if len( classes.difference( HC.IMAGES ) ) == 0:
-                
-                return 'image' + suffix
-                
-            elif len( classes.difference( HC.ANIMATIONS ) ) == 0:
-                
-                return 'animation' + suffix
+            if mime == HC.APPLICATION_HYDRUS_CLIENT_COLLECTION:
                 
-            elif len( classes.difference( HC.VIDEO ) ) == 0:
+                collections_suffix = 's' if num_collections > 1 else ''
                 
-                return 'video' + suffix
-                
-            elif len( classes.difference( HC.AUDIO ) ) == 0:
-                
-                return 'audio file' + suffix
+                return 'file{} in {} collection{}'.format( suffix, HydrusNumbers.ToHumanInt( num_collections ), collections_suffix )
                 
             else:
                 
-                return 'file' + suffix
+                return HC.mime_string_lookup[ mime ] + suffix
                 
             
         
-        num_files = sum( [ media.GetNumFiles() for media in medias ] )
-        
-        if num_files > 1000:
+        if len( classes.difference( HC.IMAGES ) ) == 0:
             
-            filetype_summary = 'files'
+            return 'image' + suffix
             
-        else:
+        elif len( classes.difference( HC.ANIMATIONS ) ) == 0:
             
-            mimes = { media.GetMime() for media in medias }
+            return 'animation' + suffix
             
-            if HC.APPLICATION_HYDRUS_CLIENT_COLLECTION in mimes:
-                
-                num_collections = len( [ media for media in medias if isinstance( media, MediaCollection ) ] )
-                
-            else:
-                
-                num_collections = 0
-                
+        elif len( classes.difference( HC.VIDEO ) ) == 0:
             
-            plural = len( medias ) > 1 or sum( ( m.GetNumFiles() for m in medias ) ) > 1
+            return 'video' + suffix
             
-            filetype_summary = GetDescriptor( plural, mimes, num_collections )
+        elif len( classes.difference( HC.AUDIO ) ) == 0:
             
+            return 'audio file' + suffix
+            
+        else:
+            
+            return 'file' + suffix
+            
+        
+    
+    if num_files > 1000:
+        
+        filetype_summary = 'files'
+        
+    else:
+        
+        plural = num_medias > 1 or num_files > 1
+        
+        filetype_summary = GetDescriptor( plural, set( mimes ), num_collections )
+        
+    
+    return f'{HydrusNumbers.ToHumanInt( num_files )} {filetype_summary}'
+    
+
+def GetMediasFiletypeSummaryString( medias: typing.Collection[ "Media" ] ):
+    
+    num_files = sum( [ media.GetNumFiles() for media in medias ] )
+    
+    if num_files > 1000:
         
-        return f'{HydrusNumbers.ToHumanInt( num_files )} {filetype_summary}'
+        # don't bother with the mime scan, we won't use it
+        return GetFiletypeSummaryString( len( medias ), num_files, (), 0 )
         
+    
+    mimes = { media.GetMime() for media in medias }
+    
+    if HC.APPLICATION_HYDRUS_CLIENT_COLLECTION in mimes:
+        
+        num_collections = len( [ media for media in medias if isinstance( media, MediaCollection ) ] )
+        
+    else:
+        
+        num_collections = 0
+        
+    
+    return GetFiletypeSummaryString( len( medias ), num_files, mimes, num_collections )
+    
 
 def GetMediasTagCount( pool, tag_service_key, tag_display_type ):
     
@@ -566,6 +577,9 @@ class MediaList( object ):
         
         self._location_context = location_context
         
+        # bumped on every add, remove, collect, sort or move, so anything caching on the order of sorted_media knows to redo itself
+        self._media_list_version = 0
+        
         self._hashes = set()
         self._hashes_ordered = []
         
@@ -716,15 +730,7 @@ class MediaList( object ):
     
     def _HasHashes( self, hashes ):
         
-        for hash in hashes:
-            
-            if hash in self._hashes:
-                
-                return True
-                
-            
-        
-        return False
+        return not self._hashes.isdisjoint( hashes )
         
     
     def _RecalcAfterContentUpdates( self, content_update_package ):
@@ -810,6 +816,8 @@ class MediaList( object ):
         
         self._sorted_media.remove_items( singleton_media.union( collected_media ) )
         
+        self._media_list_version += 1
+        
         self._RecalcAfterMediaRemove()
         
     
@@ -839,6 +847,8 @@ class MediaList( object ):
         self._singleton_media.update( addable_media )
         self._sorted_media.append_items( addable_media )
         
+        self._media_list_version += 1
+        
         return new_media
         
     
@@ -846,15 +856,20 @@ class MediaList( object ):
         
         new_media = []
         
+        # a batch can repeat itself, so catch those here before we go to the trouble of making a singleton
+        new_hashes = set()
+        
         for media_result in media_results:
             
             hash = media_result.GetHash()
             
-            if hash in self._hashes:
+            if hash in self._hashes or hash in new_hashes:
                 
                 continue
                 
             
+            new_hashes.add( hash )
+            
             new_media.append( self._GenerateMediaSingleton( media_result ) )
             
         
@@ -871,6 +886,8 @@ class MediaList( object ):
         self._selected_media = set()
         self._sorted_media = SortedList()
         
+        self._media_list_version += 1
+        
         self._RecalcAfterMediaRemove()
         
     
@@ -923,6 +940,8 @@ class MediaList( object ):
         
         self._sorted_media = SortedList( list( self._singleton_media ) + list( self._collected_media ) )
         
+        self._media_list_version += 1
+        
         self._RecalcHashes()
         
     
@@ -1197,6 +1216,8 @@ class MediaList( object ):
         
         self._sorted_media.move_items( medias, insertion_index )
         
+        self._media_list_version += 1
+        
         self._RecalcHashes()
         
     
@@ -1348,6 +1369,8 @@ class MediaList( object ):
         
         self._media_sort.Sort( self._location_context, self._sorted_media )
         
+        self._media_list_version += 1
+        
         self._RecalcHashes()
         
     
@@ -1358,8 +1381,28 @@ class ListeningMediaList( MediaList ):
         
         super().__init__( location_context, media_results, *args, **kwargs )
         
-        CG.client_controller.sub( self, 'ProcessContentUpdatePackage', 'content_updates_gui' )
-        CG.client_controller.sub( self, 'ProcessServiceUpdates', 'service_updates_gui' )
+        # we remember what we subbed to, so a subclass adding its own topics can unsub the whole lot in one go
+        self._subscribed_topics = []
+        
+        self._Subscribe( 'ProcessContentUpdatePackage', 'content_updates_gui' )
+        self._Subscribe( 'ProcessServiceUpdates', 'service_updates_gui' )
+        
+    
+    def _Subscribe( self, method_name, topic ):
+        
+        CG.client_controller.sub( self, method_name, topic )
+        
+        self._subscribed_topics.append( topic )
+        
+    
+    def _UnsubscribeAll( self ):
+        
+        for topic in self._subscribed_topics:
+            
+            CG.client_controller.unsub( self, topic )
+            
+        
+        self._subscribed_topics = []
         
     
 
@@ -1466,8 +1509,8 @@ class MediaCollection( MediaList, Media ):
     
     def _RecalcArchiveInbox( self ):
         
-        self._archive = True in ( media.HasArchive() for media in self._sorted_media )
-        self._inbox = True in ( media.HasInbox() for media in self._sorted_media )
+        self._archive = any( ( media.HasArchive() for media in self._sorted_media ) )
+        self._inbox = any( ( media.HasInbox() for media in self._sorted_media ) )
         
         if self._locations_manager is not None:
             
@@ -1570,17 +1613,34 @@ class MediaCollection( MediaList, Media ):
         
         self._RecalcArchiveInbox()
         
-        self._size = sum( [ media.GetSize() for media in self._sorted_media ] )
-        self._size_definite = False not in ( media.IsSizeDefinite() for media in self._sorted_media )
+        size = 0
+        size_definite = True
+        duration_sum = 0
+        
+        for media in self._sorted_media:
+            
+            size += media.GetSize()
+            
+            if size_definite and not media.IsSizeDefinite():
+                
+                size_definite = False
+                
+            
+            if media.HasDuration():
+                
+                duration_sum += media.GetDurationMS()
+                
+            
         
-        duration_sum = sum( [ media.GetDurationMS() for media in self._sorted_media if media.HasDuration() ] )
+        self._size = size
+        self._size_definite = size_definite
         
         if duration_sum > 0: self._duration = duration_sum
         else: self._duration = None
         
-        self._has_audio = True in ( media.HasAudio() for media in self._sorted_media )
+        self._has_audio = any( ( media.HasAudio() for media in self._sorted_media ) )
         
-        self._has_notes = True in ( media.HasNotes() for media in self._sorted_media )
+        self._has_notes = any( ( media.HasNotes() for media in self._sorted_media ) )
         
         self._RecalcRatings()
         self._RecalcFileViewingStats()
@@ -1827,6 +1887,11 @@ class MediaSingleton( Media ):
         return MediaSingleton( self._media_result.Duplicate() )
         
     
+    def DuplicateCopyOnWrite( self ):
+        
+        return MediaSingleton( self._media_result.DuplicateCopyOnWrite() )
+        
+    
     def GetDisplayMedia( self ) -> 'MediaSingleton':
         
         return self
@@ -2262,19 +2327,22 @@ class MediaSingleton( Media ):
     
     def MatchesDiscriminant( self, is_in_file_service_key = None, discriminant = None, is_not_in_file_service_key = None ):
         
-        if discriminant is not None:
+        if discriminant is None and is_in_file_service_key is None and is_not_in_file_service_key is None:
             
-            inbox = self._media_result.GetInbox()
+            return True
             
-            locations_manager = self._media_result.GetLocationsManager()
+        
+        locations_manager = self._media_result.GetLocationsManager()
+        
+        if discriminant is not None:
             
             if discriminant == CC.DISCRIMINANT_INBOX:
                 
-                p = inbox
+                p = self._media_result.GetInbox()
                 
             elif discriminant == CC.DISCRIMINANT_ARCHIVE:
                 
-                p = not inbox
+                p = not self._media_result.GetInbox()
                 
             elif discriminant == CC.DISCRIMINANT_LOCAL:
                 
@@ -2299,21 +2367,16 @@ class MediaSingleton( Media ):
                 
             
         
-        if is_in_file_service_key is not None:
+        if is_in_file_service_key is not None or is_not_in_file_service_key is not None:
             
-            locations_manager = self._media_result.GetLocationsManager()
+            current = locations_manager.GetCurrent()
             
-            if is_in_file_service_key not in locations_manager.GetCurrent():
+            if is_in_file_service_key is not None and is_in_file_service_key not in current:
                 
                 return False
                 
             
-        
-        if is_not_in_file_service_key is not None:
-            
-            locations_manager = self._media_result.GetLocationsManager()
-            
-            if is_not_in_file_service_key in locations_manager.GetCurrent():
+            if is_not_in_file_service_key is not None and is_not_in_file_service_key in current:
                 
                 return False
                 
@@ -3032,7 +3095,7 @@ class SortedList( object ):
     
     def append_items( self, items ):
         
-        if self._indices_dirty is None:
+        if self._indices_dirty:
             
             self._RecalcIndices()
             
@@ -128,6 +128,23 @@ class FileFilter( HydrusSerialisable.SerialisableBase ):
             
         
     
+    def DependsOnSelection( self ) -> bool:
+        
+        return self.filter_type in ( FILE_FILTER_SELECTED, FILE_FILTER_NOT_SELECTED )
+        
+    
+    def GetCacheKey( self ):
+        
+        if self.filter_type == FILE_FILTER_TAGS:
+            
+            ( tag_service_key, and_or_or, select_tags ) = self.filter_data
+            
+            return ( self.filter_type, ( tag_service_key, and_or_or, tuple( sorted( select_tags ) ) ) )
+            
+        
+        return ( self.filter_type, self.filter_data )
+        
+    
     def GetMediaListFileCount( self, media_list: ClientMedia.MediaList ):
         
         if self.filter_type == FILE_FILTER_ALL:
@@ -28,6 +28,64 @@ class MediaResult( object ):
         self._notes_manager = notes_manager
         self._file_viewing_stats_manager = file_viewing_stats_manager
         
+        # for copy-on-write duplicates, the managers we still share with the original
+        self._shared_managers = set()
+        
+    
+    def _UnshareManager( self, name ):
+        
+        if name not in self._shared_managers:
+            
+            return
+            
+        
+        self._shared_managers.discard( name )
+        
+        if name == 'tags':
+            
+            self._tags_manager = self._tags_manager.Duplicate()
+            
+        elif name == 'locations':
+            
+            # locations and viewing stats both hang off the times manager, so they go together
+            self._times_manager = self._times_manager.Duplicate()
+            self._locations_manager = self._locations_manager.Duplicate( self._times_manager )
+            self._file_viewing_stats_manager = self._file_viewing_stats_manager.Duplicate( self._times_manager )
+            
+        elif name == 'ratings':
+            
+            self._ratings_manager = self._ratings_manager.Duplicate()
+            
+        elif name == 'notes':
+            
+            self._notes_manager = self._notes_manager.Duplicate()
+            
+        
+    
+    def _UnshareManagerForServiceType( self, service_type ):
+        
+        if len( self._shared_managers ) == 0:
+            
+            return
+            
+        
+        if service_type in HC.REAL_TAG_SERVICES:
+            
+            self._UnshareManager( 'tags' )
+            
+        elif service_type in HC.REAL_FILE_SERVICES:
+            
+            self._UnshareManager( 'locations' )
+            
+        elif service_type in HC.RATINGS_SERVICES:
+            
+            self._UnshareManager( 'ratings' )
+            
+        elif service_type == HC.LOCAL_NOTES:
+            
+            self._UnshareManager( 'notes' )
+            
+        
     
     def DeletePending( self, service_key: bytes ):
         
@@ -42,6 +100,8 @@ class MediaResult( object ):
         
         service_type = service.GetServiceType()
         
+        self._UnshareManagerForServiceType( service_type )
+        
         if service_type in HC.REAL_TAG_SERVICES:
             
             self._tags_manager.DeletePending( service_key )
@@ -65,6 +125,20 @@ class MediaResult( object ):
         return MediaResult( file_info_manager, tags_manager, times_manager, locations_manager, ratings_manager, notes_manager, file_viewing_stats_manager )
         
     
+    def DuplicateCopyOnWrite( self ):
+        
+        # a cheap duplicate for when only a few of many copies will be written to. managers are shared until a content update would change one
+        media_result = MediaResult( self._file_info_manager, self._tags_manager, self._times_manager, self._locations_manager, self._ratings_manager, self._notes_manager, self._file_viewing_stats_manager )
+        
+        shared_managers = { 'tags', 'locations', 'ratings', 'notes' }
+        
+        # both sides have to copy before they write, or a live update to us would change the duplicate too
+        media_result._shared_managers = set( shared_managers )
+        self._shared_managers.update( shared_managers )
+        
+        return media_result
+        
+    
     def GetDuration( self ):
         
         return self._file_info_manager.duration / 1000
@@ -204,6 +278,8 @@ class MediaResult( object ):
         
         service_type = service.GetServiceType()
         
+        self._UnshareManagerForServiceType( service_type )
+        
         if service_type in HC.REAL_TAG_SERVICES:
             
             self._tags_manager.ProcessContentUpdate( service_key, content_update )
@@ -231,12 +307,17 @@ class MediaResult( object ):
     
     def ResetService( self, service_key ):
         
+        self._UnshareManager( 'tags' )
+        self._UnshareManager( 'locations' )
+        
         self._tags_manager.ResetService( service_key )
         self._locations_manager.ResetService( service_key )
         
     
     def SetTagsManager( self, tags_manager ):
         
+        self._shared_managers.discard( 'tags' )
+        
         self._tags_manager = tags_manager
         
     
@@ -419,5 +419,37 @@ class ContentUpdatePackage( object ):
         
         return content_update_package
         
+    
+    @staticmethod
+    def STATICMergeContentUpdatePackages( content_update_packages: typing.Iterable[ "ContentUpdatePackage" ], max_packages_per_merge: int ) -> typing.List[ "ContentUpdatePackage" ]:
+        
+        # we only merge runs that hit the same services, so the order the db sees each service's updates in is unchanged
+        
+        merged_content_update_packages = []
+        
+        current_package = None
+        current_service_keys = None
+        num_packages_in_current = 0
+        
+        for content_update_package in content_update_packages:
+            
+            service_keys = [ service_key for ( service_key, content_updates ) in content_update_package.IterateContentUpdates() ]
+            
+            if current_package is None or service_keys != current_service_keys or num_packages_in_current >= max_packages_per_merge:
+                
+                current_package = ContentUpdatePackage()
+                current_service_keys = service_keys
+                num_packages_in_current = 0
+                
+                merged_content_update_packages.append( current_package )
+                
+            
+            current_package.AddContentUpdatePackage( content_update_package )
+            
+            num_packages_in_current += 1
+            
+        
+        return merged_content_update_packages
+        
 
     
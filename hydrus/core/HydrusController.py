@@ -269,6 +269,11 @@ class HydrusController( HydrusControllerInterface.HydrusControllerInterface ):
         self._pubsub.sub( object, method_name, topic )
         
     
+    def unsub( self, object, topic ) -> None:
+        
+        self._pubsub.unsub( object, topic )
+        
+    
     def AcquireThreadSlot( self, thread_type ) -> bool:
         
         with self._thread_slot_lock:
@@ -195,6 +195,17 @@ class HydrusPubSub( object ):
             
         
     
+    def unsub( self, object, topic ):
+        
+        with self._lock:
+            
+            if topic in self._topics_to_objects:
+                
+                self._topics_to_objects[ topic ].discard( object )
+                
+            
+        
+    
     def WaitOnPub( self ):
         
         self._received_job_event.wait( 0.5 )
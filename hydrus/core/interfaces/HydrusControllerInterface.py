@@ -19,6 +19,11 @@ class HydrusControllerInterface( object ):
         raise NotImplementedError()
         
     
+    def unsub( self, obj: object, topic: str ) -> None:
+        
+        raise NotImplementedError()
+        
+    
     def AcquireThreadSlot( self, thread_type ) -> bool:
         
         raise NotImplementedError()
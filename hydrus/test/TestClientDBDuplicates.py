@@ -425,6 +425,54 @@ class TestClientDBDuplicates( unittest.TestCase ):
         self.assertEqual( set( result ), self._our_main_dupe_group_hashes )
         
     
+    def _test_explicit_set_new_kings( self ):
+        
+        location_context = ClientLocation.LocationContext.STATICCreateSimple( CC.LOCAL_FILE_SERVICE_KEY )
+        
+        # one write, two groups
+        
+        new_main_king_hash = self._dupe_hashes[4]
+        new_second_king_hash = self._second_group_dupe_hashes[2]
+        
+        self._write( 'duplicate_set_kings', ( new_main_king_hash, new_second_king_hash ) )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, new_main_king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ new_main_king_hash ] )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, self._king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ self._king_hash, new_main_king_hash ] )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, new_second_king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ new_second_king_hash ] )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, self._second_group_king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ self._second_group_king_hash, new_second_king_hash ] )
+        
+        # and back again, so the rest of the test sees the kings it expects
+        
+        self._write( 'duplicate_set_kings', ( self._king_hash, self._second_group_king_hash ) )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, self._king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ self._king_hash ] )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, self._second_group_king_hash, HC.DUPLICATE_KING )
+        
+        self.assertEqual( result, [ self._second_group_king_hash ] )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, new_main_king_hash, HC.DUPLICATE_MEMBER )
+        
+        self.assertEqual( set( result ), self._our_main_dupe_group_hashes )
+        
+        result = self._read( 'file_duplicate_hashes', location_context, new_second_king_hash, HC.DUPLICATE_MEMBER )
+        
+        self.assertEqual( set( result ), self._our_second_dupe_group_hashes )
+        
+    
     def _test_establish_second_group( self ):
         
         rows = []
@@ -1094,6 +1142,7 @@ class TestClientDBDuplicates( unittest.TestCase ):
         self._test_explicit_set_new_king()
         
         self._test_establish_second_group()
+        self._test_explicit_set_new_kings()
         self._test_poach_better()
         self._test_poach_same()
         self._test_group_merge()
@@ -1,6 +1,164 @@
 import unittest
 
 from hydrus.core import HydrusConstants as HC
+from hydrus.core import HydrusData
 from hydrus.core import HydrusExceptions
 
 from hydrus.client import ClientConstants as CC
+from hydrus.client.media import ClientMedia
+from hydrus.client.metadata import ClientContentUpdates
+from hydrus.client.metadata import ClientTags
+
+from hydrus.test import HelperFunctions
+
+class TestContentUpdatePackages( unittest.TestCase ):
+    
+    def test_merge( self ):
+        
+        def get_content_update():
+            
+            return ClientContentUpdates.ContentUpdate( HC.CONTENT_TYPE_FILES, HC.CONTENT_UPDATE_DELETE, { HydrusData.GenerateKey() } )
+            
+        
+        def get_summary( content_update_packages ):
+            
+            return [ [ ( service_key, len( content_updates ) ) for ( service_key, content_updates ) in content_update_package.IterateContentUpdates() ] for content_update_package in content_update_packages ]
+            
+        
+        service_key_a = CC.LOCAL_FILE_SERVICE_KEY
+        service_key_b = CC.TRASH_SERVICE_KEY
+        
+        # the limit
+        
+        content_update_packages = [ ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_a, get_content_update() ) for i in range( 5 ) ]
+        
+        merged = ClientContentUpdates.ContentUpdatePackage.STATICMergeContentUpdatePackages( content_update_packages, 2 )
+        
+        self.assertEqual( get_summary( merged ), [ [ ( service_key_a, 2 ) ], [ ( service_key_a, 2 ) ], [ ( service_key_a, 1 ) ] ] )
+        
+        # the order of the content updates is kept
+        
+        expected_content_updates = [ content_update for content_update_package in content_update_packages for ( service_key, content_updates ) in content_update_package.IterateContentUpdates() for content_update in content_updates ]
+        merged_content_updates = [ content_update for content_update_package in merged for ( service_key, content_updates ) in content_update_package.IterateContentUpdates() for content_update in content_updates ]
+        
+        self.assertEqual( merged_content_updates, expected_content_updates )
+        
+        # only runs on the same services merge
+        
+        content_update_packages = [
+            ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_a, get_content_update() ),
+            ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_a, get_content_update() ),
+            ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_b, get_content_update() ),
+            ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_a, get_content_update() )
+        ]
+        
+        merged = ClientContentUpdates.ContentUpdatePackage.STATICMergeContentUpdatePackages( content_update_packages, 100 )
+        
+        self.assertEqual( get_summary( merged ), [ [ ( service_key_a, 2 ) ], [ ( service_key_b, 1 ) ], [ ( service_key_a, 1 ) ] ] )
+        
+        # multi-service packages merge with packages on the same services
+        
+        content_update_packages = []
+        
+        for i in range( 3 ):
+            
+            content_update_package = ClientContentUpdates.ContentUpdatePackage()
+            
+            content_update_package.AddContentUpdate( service_key_a, get_content_update() )
+            content_update_package.AddContentUpdate( service_key_b, get_content_update() )
+            
+            content_update_packages.append( content_update_package )
+            
+        
+        content_update_packages.append( ClientContentUpdates.ContentUpdatePackage.STATICCreateFromContentUpdate( service_key_a, get_content_update() ) )
+        
+        merged = ClientContentUpdates.ContentUpdatePackage.STATICMergeContentUpdatePackages( content_update_packages, 100 )
+        
+        self.assertEqual( get_summary( merged ), [ [ ( service_key_a, 3 ), ( service_key_b, 3 ) ], [ ( service_key_a, 1 ) ] ] )
+        
+        # nothing in, nothing out
+        
+        self.assertEqual( ClientContentUpdates.ContentUpdatePackage.STATICMergeContentUpdatePackages( [], 100 ), [] )
+        
+    
+
+class TestMediaResult( unittest.TestCase ):
+    
+    def test_duplicate_copy_on_write( self ):
+        
+        def get_tags( media_result ):
+            
+            return media_result.GetTagsManager().GetCurrent( CC.DEFAULT_LOCAL_TAG_SERVICE_KEY, ClientTags.TAG_DISPLAY_STORAGE )
+            
+        
+        media_result = HelperFunctions.GetFakeMediaResult( HydrusData.GenerateKey() )
+        
+        hash = media_result.GetHash()
+        
+        duplicate = media_result.DuplicateCopyOnWrite()
+        
+        # the original gets a live update
+        
+        content_update = ClientContentUpdates.ContentUpdate( HC.CONTENT_TYPE_MAPPINGS, HC.CONTENT_UPDATE_ADD, ( 'original', { hash } ) )
+        
+        media_result.ProcessContentUpdate( CC.DEFAULT_LOCAL_TAG_SERVICE_KEY, content_update )
+        
+        self.assertIn( 'original', get_tags( media_result ) )
+        self.assertNotIn( 'original', get_tags( duplicate ) )
+        
+        # the duplicate gets an update
+        
+        content_update = ClientContentUpdates.ContentUpdate( HC.CONTENT_TYPE_MAPPINGS, HC.CONTENT_UPDATE_ADD, ( 'duplicate', { hash } ) )
+        
+        duplicate.ProcessContentUpdate( CC.DEFAULT_LOCAL_TAG_SERVICE_KEY, content_update )
+        
+        self.assertIn( 'duplicate', get_tags( duplicate ) )
+        self.assertNotIn( 'duplicate', get_tags( media_result ) )
+        
+        # and the other way around
+        
+        duplicate = media_result.DuplicateCopyOnWrite()
+        
+        content_update = ClientContentUpdates.ContentUpdate( HC.CONTENT_TYPE_MAPPINGS, HC.CONTENT_UPDATE_DELETE, ( 'original', { hash } ) )
+        
+        duplicate.ProcessContentUpdate( CC.DEFAULT_LOCAL_TAG_SERVICE_KEY, content_update )
+        
+        self.assertNotIn( 'original', get_tags( duplicate ) )
+        self.assertIn( 'original', get_tags( media_result ) )
+        
+        content_update = ClientContentUpdates.ContentUpdate( HC.CONTENT_TYPE_MAPPINGS, HC.CONTENT_UPDATE_DELETE, ( 'blue_eyes', { hash } ) )
+        
+        media_result.ProcessContentUpdate( CC.DEFAULT_LOCAL_TAG_SERVICE_KEY, content_update )
+        
+        self.assertNotIn( 'blue_eyes', get_tags( media_result ) )
+        self.assertIn( 'blue_eyes', get_tags( duplicate ) )
+        
+    
+
+class TestSortedList( unittest.TestCase ):
+    
+    def test_append_items( self ):
+        
+        sorted_list = ClientMedia.SortedList( [ 'a', 'b', 'c', 'd' ] )
+        
+        self.assertEqual( sorted_list.index( 'c' ), 2 )
+        
+        # removing dirties the indices, so the append has to catch them up before adding its own
+        
+        sorted_list.remove_items( [ 'b' ] )
+        
+        sorted_list.append_items( [ 'e', 'f' ] )
+        
+        self.assertEqual( list( sorted_list ), [ 'a', 'c', 'd', 'e', 'f' ] )
+        
+        for ( i, item ) in enumerate( [ 'a', 'c', 'd', 'e', 'f' ] ):
+            
+            self.assertEqual( sorted_list.index( item ), i )
+            
+        
+        with self.assertRaises( HydrusExceptions.DataMissing ):
+            
+            sorted_list.index( 'b' )
+            
+        
+    
@@ -370,6 +370,11 @@ class Controller( object ):
         self._pubsub.sub( object, method_name, topic )
         
     
+    def unsub( self, object, topic ):
+        
+        self._pubsub.unsub( object, topic )
+        
+    
     def AcquirePageKey( self ):
         
         return HydrusData.GenerateKey()
@@ -1,6 +1,7 @@
 import unittest
 
 from hydrus.core import HydrusNumbers
+from hydrus.core import HydrusPubSub
 
 class TestHydrusData( unittest.TestCase ):
     
@@ -19,3 +20,48 @@ class TestHydrusData( unittest.TestCase ):
         self.assertEqual( HydrusNumbers.IntToPrettyOrdinalString( 1011 ), '1,011th' )
         
     
+
+class TestHydrusPubSub( unittest.TestCase ):
+    
+    def test_unsub( self ):
+        
+        class Listener( object ):
+            
+            def __init__( self ):
+                
+                self.received = []
+                
+            
+            def Receive( self, value ):
+                
+                self.received.append( value )
+                
+            
+        
+        pubsub = HydrusPubSub.HydrusPubSub( lambda o: True )
+        
+        listener = Listener()
+        other_listener = Listener()
+        
+        pubsub.sub( listener, 'Receive', 'test_topic' )
+        pubsub.sub( listener, 'Receive', 'other_topic' )
+        pubsub.sub( other_listener, 'Receive', 'test_topic' )
+        
+        pubsub.pubimmediate( 'test_topic', 1 )
+        
+        self.assertEqual( listener.received, [ 1 ] )
+        self.assertEqual( other_listener.received, [ 1 ] )
+        
+        pubsub.unsub( listener, 'test_topic' )
+        
+        pubsub.pubimmediate( 'test_topic', 2 )
+        pubsub.pubimmediate( 'other_topic', 3 )
+        
+        # only that one topic is gone, and the other listener still hears it
+        self.assertEqual( listener.received, [ 1, 3 ] )
+        self.assertEqual( other_listener.received, [ 1, 2 ] )
+        
+        # unsubbing from something we are not subbed to is fine
+        pubsub.unsub( listener, 'test_topic' )
+        pubsub.unsub( listener, 'never_subbed_topic' )
+        